@@ -1,159 +1,700 @@
 # app.py
+import os
 import sys
-import queue
+import time
+import tkinter as tk
 from tkinter import filedialog, messagebox
-from PIL import Image, ImageTk
 
+import metrics
 from view import View
-from pdf_model import PDFModel
-from renderer import RenderWorker
-from config import CACHE_SIZE_LIMIT
+from config import (RESULT_TIME_BUDGET_MS, SCROLL_SETTLE_MS, THUMBNAIL_BUFFER, THUMBNAIL_SAVE_INTERVAL,
+                    DISK_CACHE_MAX_BYTES, RELAYOUT_DEBOUNCE_MS, RELAYOUT_PREVIEW_MS, RENDER_PROCESSES,
+                    STARTUP_POLL_MS, STARTUP_PAINT_TIMEOUT_MS)
+from scheduler import PRIORITY_PREVIEW, PRIORITY_VISIBLE, PRIORITY_AHEAD, PRIORITY_BUFFER
+from page_cache import CachedImage
+from notifier import TkNotifier, NotifyingQueue
+from disk_cache import DiskPageCache
+from opener import DocumentOpener
+from storage import cache_dir
+from tiles import needs_tiling, tiles_in_region
+from tabs import DocumentTab
+# The modules that load PyMuPDF (pdf_model, renderer, layout, ...) and PIL are imported where they
+# are first used, so the window can appear before they are loaded; see DocumentOpener
+
+# When set, startup milestones are printed as wall clock times and the viewer exits after the
+# first sharp page (used by benchmarks/bench_startup.py)
+STARTUP_PROBE_ENV = "PDFVIEWER_STARTUP_PROBE"
 
 class PdfApplication(View):
     """
     The main application class for the PDF Viewer.
     Acts as the controller, managing state and communication between model and view.
     """
-    def __init__(self):
+    def __init__(self, opener: DocumentOpener = None):
         super().__init__()
 
+        # Opens the document from the command line while the window is built
+        self._opener = opener or DocumentOpener(sys.argv[1] if len(sys.argv) > 1 else None)
+        self._startup_probe = bool(os.environ.get(STARTUP_PROBE_ENV))
+        self._started = False
         self.pdf_model = None
         self.renderer = None
-        self.result_queue = queue.Queue()
+        self.disk_cache = None
+        self.layout = None
+        self.size_scanner = None
+        self.search_worker = None
+        self.index_builder = None
+        self.thumbnail_worker = None
+        self.thumbnails = None
+        # Open documents in tab order; the active one's state lives on the controller
+        self.tabs = []
+        self.active_tab = None
+        # Render processes shared by all tabs, created with the first document
+        self.render_pool = None
+        # PhotoImages of the thumbnails that have a sidebar item
+        self.thumb_images = {}
+        # Workers wake the event loop through this virtual event when they queue results
+        self.notifier = TkNotifier(self, "<<WorkerResults>>")
+        self.result_queue = NotifyingQueue(self.notifier)
+        self.size_queue = NotifyingQueue(self.notifier)
+        self.search_queue = NotifyingQueue(self.notifier)
+        self.thumb_queue = NotifyingQueue(self.notifier)
+        # The pending poll of the queues when the workers cannot post events (see _drain_worker_queues)
+        self._poll_after = None
+        # Documents forwarded by later launches in single-instance mode
+        self.open_queue = NotifyingQueue(self.notifier)
+        self.instance_server = None
+        self.scroll_direction = 1
+        self._last_scroll_y = 0.0
+        # Pages that were on screen at the last render request, for the prefetch hit rate
+        self._shown_pages = range(0)
+        self._settle_after = None
+        # Canvas width the layout was computed for
+        self._layout_width = 0
+        # Pending coalesced relayout, when the pages on screen were last stretched while it waits,
+        # and the stretched images shown on their items until then
+        self._relayout_after = None
+        self._last_relayout_preview = 0.0
+        self._preview_images = {}
 
         self._bind_app_events()
-        self._check_result_queue()
+        # Results queued before the main loop starts are picked up on the first idle tick
+        self.after_idle(self._drain_worker_queues)
 
-        if len(sys.argv) > 1:
-            self.load_pdf(sys.argv[1])
+        # Icons, tooltips and the document follow the first paint of the window
+        self._expose_binding = self.canvas.bind("<Expose>", self._on_first_expose)
+        self.after(STARTUP_PAINT_TIMEOUT_MS, self._after_first_paint)
+
+    def _on_first_expose(self, event=None):
+        self.canvas.unbind("<Expose>", self._expose_binding)
+        # Runs after the redraw Tk has just scheduled
+        self.after_idle(self._after_first_paint)
+
+    def _after_first_paint(self):
+        if self._started:
+            return
+        self._started = True
+        self._report_startup("window")
+        self.create_deferred_widgets()
+        self._open_when_ready()
+
+    def _open_when_ready(self):
+        """Shows the document given on the command line as soon as DocumentOpener has it."""
+        opener = self._opener
+        if opener.is_alive():
+            self.after(STARTUP_POLL_MS, self._open_when_ready)
+            return
+        self._opener = None
+        if opener.error is not None:
+            if opener.path:
+                messagebox.showerror("Error", f"Failed to open PDF: {opener.error}")
+            else:
+                print(f"Preloading failed: {opener.error}")
+        elif opener.pdf_model is not None:
+            self.load_pdf(opener.path, opener.pdf_model)
+        if not self.open_queue.empty():
+            self.after_idle(self._drain_worker_queues)
+
+    def _report_startup(self, milestone):
+        if not self._startup_probe:
+            return
+        print(f"startup {milestone} {time.time():.6f}", flush=True)
+        if milestone == "first_page":
+            self._startup_probe = False
+            self.after_idle(self._on_closing)
 
     def _bind_app_events(self):
         self.protocol("WM_DELETE_WINDOW", self._on_closing)
         self.bind("<Control-o>", lambda e: self.open_pdf())
+        self.bind("<<WorkerResults>>", self._on_worker_results)
+
+    def serve_instance(self):
+        """Lets later launches open their documents in this window (single-instance mode)."""
+        import single_instance
+        self.instance_server = single_instance.listen(self.open_queue)
+
+    def _apply_open_requests(self):
+        """Opens the documents forwarded by other launches, each in its own tab, and raises the window."""
+        while not self.open_queue.empty():
+            path = self.open_queue.get_nowait()
+            if path:
+                self.load_pdf(path)
+        self.deiconify()
+        self.lift()
+        self.focus_force()
 
     def _on_closing(self):
-        if self.renderer:
-            self.renderer.stop()
+        if self._poll_after:
+            self.after_cancel(self._poll_after)
+            self._poll_after = None
+        if self.instance_server:
+            self.instance_server.stop()
+        for tab in self.tabs:
+            self._shutdown_document(self if tab is self.active_tab else tab)
+        if self.render_pool:
+            # Not waiting: a finishing job's callback may itself be waiting for this thread to queue its result
+            self.render_pool.shutdown(wait=False)
+        path = metrics.dump_trace()
+        if path:
+            print(f"Performance trace written to {path}")
         self.destroy()
 
+    def _shutdown_document(self, doc):
+        """Stops the workers of a document and closes it. `doc` is the controller or a background tab."""
+        for worker in (doc.search_worker, doc.index_builder, doc.thumbnail_worker, doc.size_scanner,
+                       doc.renderer):
+            if worker:
+                worker.stop()
+        if doc.thumbnails is not None:
+            doc.thumbnails.save()
+        if doc.disk_cache:
+            doc.disk_cache.close()
+        if doc.pdf_model:
+            doc.pdf_model.close()
+        doc.cache.detach()
+
+    def _shared_render_pool(self):
+        """The render process pool of all tabs, started with the first document. None in thread mode."""
+        from render_pool import RenderPool, default_process_count
+        if self.render_pool is None and default_process_count(RENDER_PROCESSES) > 1:
+            self.render_pool = RenderPool(default_process_count(RENDER_PROCESSES))
+        return self.render_pool
+
+    def _clear_document_state(self):
+        """Gives the controller the state of no open document."""
+        self.pdf_model = None
+        self.renderer = None
+        self.disk_cache = None
+        self.layout = None
+        self.size_scanner = None
+        self.search_worker = None
+        self.index_builder = None
+        self.thumbnail_worker = None
+        self.thumbnails = None
+        # Fresh queues so results from another document's workers are never applied
+        self.result_queue = NotifyingQueue(self.notifier)
+        self.size_queue = NotifyingQueue(self.notifier)
+        self.search_queue = NotifyingQueue(self.notifier)
+        self.thumb_queue = NotifyingQueue(self.notifier)
+        self.cache = self.new_page_cache()
+        self.search_active = False
+        self.search_term = ""
+        self.search_results = []
+        self.current_search_hit = 0
+        self.search_progress = None
+        self.scroll_direction = 1
+        self._last_scroll_y = 0.0
+        self._shown_pages = range(0)
+        self._layout_width = 0
+
     def open_pdf(self):
         path = filedialog.askopenfilename(filetypes=[("PDF files", "*.pdf")])
         if path:
             self.load_pdf(path)
 
-    def load_pdf(self, path: str):
-        try:
-            if self.renderer:
-                self.renderer.stop()
-            if self.pdf_model:
-                self.pdf_model.close()
-
-            self.pdf_model = PDFModel(path)
-            self.renderer = RenderWorker(self.pdf_model.doc, self.result_queue)
+    def load_pdf(self, path: str, pdf_model=None):
+        """
+        Opens a document in a new tab, or switches to its tab if it is already
+        open. `pdf_model` is the document if it was already opened elsewhere.
+        """
+        from pdf_model import PDFModel
+        from renderer import RenderWorker
+        from layout import PageLayout, PageSizeScanner
+        from thumbnails import ThumbnailWorker
+
+        for i, tab in enumerate(self.tabs):
+            if os.path.abspath(tab.path) == os.path.abspath(path):
+                if pdf_model is not None:
+                    pdf_model.close()
+                self.tab_bar.select(i)
+                return
+        if pdf_model is None:
+            try:
+                pdf_model = PDFModel(path)
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to open PDF: {e}")
+                return
+
+        if self.active_tab:
+            self._stash_active_tab()
+        else:
+            self.cache.detach()
+        self._clear_document_state()
+
+        self.pdf_model = pdf_model
+        if DISK_CACHE_MAX_BYTES > 0:
+            try:
+                self.disk_cache = DiskPageCache(cache_dir("pages"), self.pdf_model.fingerprint)
+            except OSError as e:
+                # Every page is rendered, as without the disk cache
+                print(f"Could not open page cache: {e}")
+        self.renderer = RenderWorker(self.pdf_model.doc, self.result_queue, disk_cache=self.disk_cache,
+                                     pool=self._shared_render_pool(), fingerprint=self.pdf_model.fingerprint)
+        self.thumbnails = self.pdf_model.load_thumbnails()
+        self.thumbnail_worker = ThumbnailWorker(path, self.thumb_queue, self.renderer.busy)
+
+        geometry = self.pdf_model.load_geometry()
+        if geometry is not None:
+            self.layout = PageLayout.from_geometry(geometry)
+        else:
+            self.layout = PageLayout(self.pdf_model.page_count, self.pdf_model.estimate_page_size())
+            self.size_scanner = PageSizeScanner(path, self.pdf_model.page_count, self.size_queue)
+
+        tab = DocumentTab(path)
+        self.tabs.append(tab)
+        self.active_tab = tab
+        self.add_tab_label(tab.title)
+        self.reset_ui_for_new_pdf(self.pdf_model.page_count)
+        # Laid out as soon as the tab strip is in place; the user may have switched tabs in the meantime
+        self.after_idle(lambda: tab is self.active_tab and self.initial_layout_and_render())
+
+    def _stash_active_tab(self):
+        """Moves the active document into its tab, leaving its workers idle in the background."""
+        tab = self.active_tab
+        # Nothing of a background document is rendered; its queued thumbnails wait too
+        self.renderer.new_generation()
+        self.thumbnail_worker.retain(())
+        tab.scroll_fraction = self.canvas.yview()[0]
+        # Tiles are canvas items, full pages keep their images so the tab comes back painted
+        self._drop_cached(lambda key: key[1] is not None)
+        self.cache.on_evict = None
+        self.cache.pin(())
+        self.thumbnails.save()
+        self.thumb_images.clear()
+        if self._relayout_after:
+            # The pending relayout runs when the tab is shown again
+            self.after_cancel(self._relayout_after)
+            self._relayout_after = None
+            self._layout_width = 0
+            self._preview_images.clear()
+        if self._settle_after:
+            self.after_cancel(self._settle_after)
+            self._settle_after = None
+        tab.store(self)
+        self.active_tab = None
+
+    def _switch_to(self, tab):
+        """Shows a background tab's document in the shared canvas."""
+        tab.restore(self)
+        self.active_tab = tab
+        self.cache.on_evict = self.release_cached
+        self.reset_canvases()
+        self.search_entry.delete(0, tk.END)
+        self.search_entry.insert(0, self.search_term)
+        state = tk.NORMAL if self.search_results else tk.DISABLED
+        self.search_prev_btn.config(state=state)
+        self.search_next_btn.config(state=state)
+
+        # A window resize or zoom while the tab was in the background leaves its layout stale
+        stale = self._layout_width != self.canvas.winfo_width()
+        self._precalculate_layout()
+        if stale and self.page_positions:
+            self._rescale_cached_pages()
+        self.canvas.yview_moveto(tab.scroll_fraction)
+        self.request_render_visible_pages(force_rerender=stale)
+        self.update_thumbnails()
+        self.mark_current_thumbnail()
+        self.update_statusbar()
+        # Page sizes, search hits and thumbnails queued while the tab was in the background
+        self.after_idle(self._drain_worker_queues)
 
-            self.reset_ui_for_new_pdf(self.pdf_model.page_count)
-            self.after(100, self.initial_layout_and_render)
+    def _on_tab_changed(self, event=None):
+        if not self.tabs:
+            return
+        tab = self.tabs[self.tab_bar.index("current")]
+        if tab is self.active_tab:
+            return
+        if self.active_tab:
+            self._stash_active_tab()
+        self._switch_to(tab)
 
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to open PDF: {e}")
-            self.pdf_model = None
+    def close_tab(self):
+        """Closes the active document. The next tab is shown, or the empty viewer after the last one."""
+        if not self.active_tab:
+            return
+        index = self.tabs.index(self.active_tab)
+        self._shutdown_document(self)
+        self.tabs.pop(index)
+        self.active_tab = None
+        self._clear_document_state()
+        self.thumb_images.clear()
+        self.tab_bar.forget(index)
+        if self.tabs:
+            # The next tab brings its own cache, the empty one must not stay in the shared budget
+            self.cache.detach()
+            self._on_tab_changed()
+        else:
+            self.reset_ui_for_new_pdf(0)
 
     def initial_layout_and_render(self):
         self._precalculate_layout()
         self.request_render_visible_pages()
         self.scroll_to_page(0)
+        self.update_thumbnails()
+        self.mark_current_thumbnail()
 
-    def _precalculate_layout(self):
-        if not self.pdf_model:
+    def update_thumbnails(self):
+        """Gives the thumbnails in the sidebar's view an item and requests the missing ones."""
+        if self.thumbnails is None:
             return
-        y_pos, spacing = 10, 20
+        slot = self.thumbnail_slot_height()
+        y0 = self.thumb_canvas.canvasy(0)
+        y1 = y0 + self.thumb_canvas.winfo_height()
+        first = max(int(y0 // slot) - THUMBNAIL_BUFFER, 0)
+        last = min(int(y1 // slot) + THUMBNAIL_BUFFER, self.page_count - 1)
+        window = range(first, last + 1)
+
+        self.thumb_items.show(window, self._thumbnail_image, self.thumbnail_origin)
+        # Only thumbnails with an item hold a Tk image
+        for i in [i for i in self.thumb_images if i not in window]:
+            del self.thumb_images[i]
+
+        self.thumbnail_worker.retain(window)
+        for i in window:
+            if i not in self.thumbnails:
+                self.thumbnail_worker.request(i)
+
+    def _thumbnail_image(self, page_index):
+        png = self.thumbnails.get(page_index)
+        if png is None:
+            return self.placeholder
+        img = tk.PhotoImage(data=png, format="PNG")
+        self.thumb_images[page_index] = img
+        return img
+
+    def _apply_thumbnails(self):
+        while not self.thumb_queue.empty():
+            page_index, png = self.thumb_queue.get_nowait()
+            self.thumbnails.put(page_index, png)
+            item = self.thumb_items.get(page_index)
+            if item is not None:
+                self.thumb_canvas.itemconfig(item, image=self._thumbnail_image(page_index))
+        if self.thumbnails.unsaved >= THUMBNAIL_SAVE_INTERVAL:
+            self.thumbnails.save()
+
+    @metrics.timed("ui.layout")
+    def _precalculate_layout(self, changed_pages=None):
+        """Lays out all pages, or only `changed_pages` and the pages below them when the zoom is unchanged."""
+        if not self.pdf_model or not self.layout:
+            return
+        metrics.count("ui.layout_passes")
         canvas_w = self.canvas.winfo_width()
-        total_height = y_pos
+        self._layout_width = canvas_w
+        if changed_pages is None or not self.page_positions:
+            total_height = self.layout.compute(self.get_page_scale)
+        else:
+            total_height = self.layout.relayout_pages(changed_pages, self.get_page_scale)
+        self.page_dims = self.layout.dims
+        self.page_positions = self.layout.positions
+
+        # Only the pooled items near the viewport exist, the scroll region comes from the layout
+        self.page_items.place(self.page_origin)
+        for (i, tile) in self.cache.keys():
+            if tile is not None:
+                item = self.cache.peek((i, tile)).item
+                self.canvas.coords(item, self.page_x(i) + tile[0], self.page_positions[i] + tile[1])
+
+        self.canvas.config(scrollregion=(0, 0, max(canvas_w, self.layout.max_width), total_height))
+
+    def _apply_page_sizes(self):
+        """Applies real page sizes read by the scanner, keeping the viewport anchored."""
+        changed = []
+        while not self.size_queue.empty():
+            start, geometry = self.size_queue.get_nowait()
+            changed.extend(self.layout.update_sizes(start, geometry))
+        if self.size_scanner and self.layout.is_complete():
+            self.pdf_model.save_geometry(self.layout.sizes, self.layout.rotations)
+            self.size_scanner = None
+        if not changed or not self.page_positions:
+            return
 
-        self.page_dims.clear()
-        self.page_positions.clear()
+        # Pages rendered from an estimated size have the wrong scale
+        changed_pages = set(changed)
+        self._drop_cached(lambda key: key[0] in changed_pages)
 
-        for i in range(self.page_count):
-            page_rect = self.pdf_model.get_page_size(i)
-            scale = self.get_page_scale(page_rect.width)
+        # Remember which page is at the top of the viewport and how far into it we are
+        y0 = self.canvas.canvasy(0)
+        anchor = self.layout.page_at(y0)
+        old_h = max(self.page_dims[anchor][1], 1)
+        fraction = (y0 - self.page_positions[anchor]) / old_h
 
-            w, h = int(page_rect.width * scale), int(page_rect.height * scale)
-            self.page_dims.append((w, h))
-            self.page_positions.append(total_height)
+        self._precalculate_layout(changed_pages)
 
-            x_centered = max((canvas_w - w) // 2, 0)
-            self.canvas.coords(self.canvas_items[i], x_centered, total_height)
-            total_height += h + spacing
+        new_y = self.page_positions[anchor] + fraction * self.page_dims[anchor][1]
+        if self.layout.total_height > 0:
+            self.canvas.yview_moveto(new_y / self.layout.total_height)
+        self.request_render_visible_pages()
 
-        self.canvas.config(scrollregion=(0, 0, canvas_w, total_height))
+    def _on_worker_results(self, event=None):
+        # Acknowledge first, so results queued while draining post a new event
+        self.notifier.acknowledge()
+        self._drain_worker_queues()
 
-    def _check_result_queue(self):
+    @metrics.timed("ui.drain")
+    def _drain_worker_queues(self):
+        """Applies page sizes, search hits and rendered pages queued by the worker threads."""
+        backlog = False
         try:
+            if self.layout and not self.size_queue.empty():
+                self._apply_page_sizes()
+            if not self.search_queue.empty():
+                self._apply_search_results()
+            if self.thumbnails is not None and not self.thumb_queue.empty():
+                self._apply_thumbnails()
+            # Forwarded documents wait until the one from the command line is open
+            if self._opener is None and self._started and not self.open_queue.empty():
+                self._apply_open_requests()
+            # Stop after the time budget so a burst of results cannot stall the UI, the rest follow next tick
+            deadline = time.perf_counter() + RESULT_TIME_BUDGET_MS / 1000
             while not self.result_queue.empty():
-                page_index, zoom, rotation, img = self.result_queue.get_nowait()
-                # Ensure the received image matches current settings before displaying
-                if abs(zoom - self.get_page_scale(self.pdf_model.get_page_size(page_index).width)) < 0.01 and rotation == self.rotation:
-                     self._place_rendered_image(page_index, img)
+                if time.perf_counter() > deadline:
+                    backlog = True
+                    break
+                job, data, width, height = self.result_queue.get_nowait()
+                if job.generation != self.renderer.generation:
+                    continue
+                # The page size may have been corrected since the request was made
+                scale = self.get_page_scale(self.layout.page_size(job.page_index)[0])
+                if abs(job.zoom - scale) >= 0.01 or job.rotation != self.rotation:
+                    continue
+                # Skip previews that would be discarded before paying for the PhotoImage
+                if job.tile is None and job.preview and self._has_sharp_image(job.page_index, job.zoom):
+                    continue
+                # The worker already built PPM data, Tk decodes it without going through PIL
+                with metrics.span("ui.photoimage"):
+                    tk_img = tk.PhotoImage(data=data, format="PPM")
+                # PhotoImage keeps 32 bits per pixel
+                nbytes = width * height * 4
+                if job.tile is None:
+                    self._place_rendered_image(job.page_index, tk_img, nbytes, job.zoom, sharp=not job.preview)
+                else:
+                    self._place_rendered_tile(job.page_index, job.tile, tk_img, nbytes, job.zoom)
         finally:
-            self.after(50, self._check_result_queue)
-
-    def _place_rendered_image(self, page_index, img: Image.Image):
-        tk_img = ImageTk.PhotoImage(img)
-        self.cache[page_index] = tk_img
-        self.canvas.itemconfig(self.canvas_items[page_index], image=tk_img)
-
-        if page_index in self.cache_keys:
-            self.cache_keys.remove(page_index)
-        self.cache_keys.append(page_index)
+            if backlog:
+                self.after(1, self._drain_worker_queues)
+            elif not self.notifier.threaded and self._poll_after is None:
+                # Without a thread-enabled Tcl the workers cannot post events, so keep polling (one chain)
+                self._poll_after = self.after(50, self._poll_worker_queues)
+
+    def _poll_worker_queues(self):
+        self._poll_after = None
+        self._drain_worker_queues()
+
+    def _has_sharp_image(self, page_index, scale):
+        existing = self.cache.peek((page_index, None))
+        return existing is not None and existing.sharp and abs(existing.scale - scale) < 0.01
+
+    def _place_rendered_image(self, page_index, tk_img, nbytes, scale, sharp=True):
+        """Shows a page's image and caches it. `nbytes` is the image's memory footprint."""
+        if not sharp and self._has_sharp_image(page_index, scale):
+            # A preview must never replace the sharp image, which may have arrived first
+            return
+        # The page may have scrolled out of the window, it gets the image when it comes back
+        item = self.page_items.get(page_index)
+        if item is not None:
+            self.canvas.itemconfig(item, image=tk_img)
+            if sharp:
+                self._report_startup("first_page")
+        self.cache.put((page_index, None), CachedImage(tk_img, scale, sharp), nbytes)
+
+    def _pages_near_current(self):
+        """Returns the pages that fit in the viewport from the current page on, plus the buffer."""
+        top = self.page_positions[self.current_page]
+        first, last = self.layout.visible_range(top, top + self.canvas.winfo_height()) or \
+            (self.current_page, self.current_page)
+        return range(max(first - self.buffer_pages, 0), last + self.buffer_pages + 1)
+
+    def _rescale_cached_pages(self):
+        """
+        After a zoom change, scales the cached bitmaps of the pages around the
+        current page to their new size, so they stay on screen until the sharp
+        renders arrive. All other cached pages and tiles are dropped.
+        """
+        from PIL import Image, ImageTk
+        keep = self._pages_near_current()
+        for key in list(self.cache.keys()):
+            page_index, tile = key
+            entry = self.cache.pop(key)
+            w, h = self.page_dims[page_index]
+            if tile is None and page_index in keep and not needs_tiling(w, h):
+                img = ImageTk.getimage(entry.image).resize((w, h), Image.BILINEAR)
+                scale = self.get_page_scale(self.layout.page_size(page_index)[0])
+                self._place_rendered_image(page_index, ImageTk.PhotoImage(img), w * h * 4, scale, sharp=False)
+            else:
+                self.release_cached(key, entry)
+
+    def _rotate_cached_pages(self):
+        """
+        After a rotation by 90°, turns the cached bitmaps of the pages around
+        the current page with a pixel transpose. A bitmap whose scale is
+        unchanged stays sharp; where fit-to-width changed the scale it is also
+        resized and re-rendered in the background. All other entries are dropped.
+        """
+        from PIL import Image, ImageTk
+        keep = self._pages_near_current()
+        for key in list(self.cache.keys()):
+            page_index, tile = key
+            entry = self.cache.pop(key)
+            w, h = self.page_dims[page_index]
+            if tile is None and page_index in keep and not needs_tiling(w, h):
+                # PIL rotates counterclockwise, the view rotates clockwise
+                img = ImageTk.getimage(entry.image).transpose(Image.Transpose.ROTATE_270)
+                scale = self.get_page_scale(self.layout.page_size(page_index)[0])
+                sharp = entry.sharp and abs(entry.scale - scale) < 0.01 and img.size == (w, h)
+                if img.size != (w, h):
+                    img = img.resize((w, h), Image.BILINEAR)
+                self._place_rendered_image(page_index, ImageTk.PhotoImage(img), w * h * 4, scale, sharp)
+            else:
+                self.release_cached(key, entry)
+
+    def _place_rendered_tile(self, page_index, tile, tk_img, nbytes, scale):
+        key = (page_index, tile)
+        old = self.cache.pop(key)
+        if old is not None:
+            self.release_cached(key, old)
+        x, y = self.page_x(page_index) + tile[0], self.page_positions[page_index] + tile[1]
+        item = self.canvas.create_image(x, y, anchor="nw", image=tk_img, tags=("tile",))
+        # Keep search highlights above newly created tiles
+        self.canvas.tag_raise("highlight")
+        self.cache.put(key, CachedImage(tk_img, scale, True, item), nbytes)
+
+    def _drop_cached(self, predicate=None):
+        """Removes cached pages and tiles (all of them, or those whose key matches `predicate`)."""
+        for key in [k for k in self.cache.keys() if predicate is None or predicate(k)]:
+            self.release_cached(key, self.cache.pop(key))
+
+    def _tile_jobs(self, page_index, x0, y0, x1, y1):
+        """
+        Returns (tile, priority) for the tiles of a tiled page near the viewport.
+        Tiles in the viewport are visible; tiles up to one viewport height above
+        or below it are prefetched.
+        """
+        band = y1 - y0
+        px, py = self.page_x(page_index), self.page_positions[page_index]
+        w, h = self.page_dims[page_index]
+        jobs = []
+        for tile in tiles_in_region(w, h, x0 - px, y0 - band - py, x1 - px, y1 + band - py):
+            top, bottom = py + tile[1], py + tile[3]
+            if bottom >= y0 and top <= y1:
+                priority = PRIORITY_VISIBLE
+            elif (top > y1) == (self.scroll_direction > 0):
+                priority = PRIORITY_AHEAD
+            else:
+                priority = PRIORITY_BUFFER
+            jobs.append((tile, priority))
+        return jobs
 
+    @metrics.timed("ui.request_render")
     def request_render_visible_pages(self, force_rerender=False):
         if not self.pdf_model or not self.page_positions:
             return
         y0 = self.canvas.canvasy(0)
         y1 = y0 + self.canvas.winfo_height()
-        indices_to_render = set()
-
-        for i, y_pos in enumerate(self.page_positions):
-            if i < len(self.page_dims):
-                h = self.page_dims[i][1]
-                if (y_pos + h) >= y0 and y_pos <= y1:
-                    indices_to_render.add(i)
-
-        if indices_to_render:
-            min_vis, max_vis = min(indices_to_render), max(indices_to_render)
-            start = max(0, min_vis - self.buffer_pages)
-            end = min(self.page_count - 1, max_vis + self.buffer_pages)
-            for i in range(start, end + 1):
-                indices_to_render.add(i)
-
-        for i in sorted(list(indices_to_render)):
-            if force_rerender or i not in self.cache:
-                page_width = self.pdf_model.get_page_size(i).width
-                scale = self.get_page_scale(page_width)
-                if self.renderer:
-                    self.renderer.render(i, scale, self.rotation)
-
-        self._manage_cache(indices_to_render)
+        x0 = self.canvas.canvasx(0)
+        x1 = x0 + self.canvas.winfo_width()
+        if y0 != self._last_scroll_y:
+            self.scroll_direction = 1 if y0 > self._last_scroll_y else -1
+            self._last_scroll_y = y0
+        jobs = []
+        # Pages only passed through during a fling are not rendered sharp, nor are pages beyond them
+        flinging = self.scroll_tracker.is_fling(y1 - y0)
+        if flinging:
+            if self._settle_after:
+                self.after_cancel(self._settle_after)
+            self._settle_after = self.after(SCROLL_SETTLE_MS + 10, self._on_scroll_settled)
+
+        visible = self.layout.visible_range(y0, y1)
+        window = range(0)
+        if visible:
+            min_vis, max_vis = visible
+            if not flinging:
+                self._count_prefetch_hits(range(min_vis, max_vis + 1))
+            # Prefetch further ahead the faster the user scrolls
+            n_ahead, n_behind = (0, 0) if flinging else \
+                self.scroll_tracker.prefetch_extent(self.buffer_pages, self.page_dims[min_vis][1])
+            n_after, n_before = (n_ahead, n_behind) if self.scroll_direction > 0 else (n_behind, n_ahead)
+            before = range(min_vis - 1, max(0, min_vis - n_before) - 1, -1)
+            after = range(max_vis + 1, min(self.page_count - 1, max_vis + n_after) + 1)
+            ahead, behind = (after, before) if self.scroll_direction > 0 else (before, after)
+            # Nearest pages first within each priority
+            jobs += [(i, PRIORITY_VISIBLE) for i in range(min_vis, max_vis + 1)]
+            jobs += [(i, PRIORITY_AHEAD) for i in ahead]
+            jobs += [(i, PRIORITY_BUFFER) for i in behind]
+            window = range(min_vis - len(before), max_vis + len(after) + 1)
+        self.page_items.show(window, self.page_image, self.page_origin)
+
+        # Large pages are rendered as tiles, and only near the viewport
+        render_jobs = []
+        for i, priority in jobs:
+            if needs_tiling(*self.page_dims[i]):
+                if min_vis <= i <= max_vis:
+                    render_jobs += [(i, tile, p) for tile, p in self._tile_jobs(i, x0, y0, x1, y1)]
+            else:
+                render_jobs.append((i, None, priority))
+        wanted_keys = {(i, tile) for i, tile, _ in render_jobs}
+        # Pages and tiles on screen must survive eviction
+        self.cache.pin((i, tile) for i, tile, priority in render_jobs if priority == PRIORITY_VISIBLE)
+
+        if self.renderer:
+            self.renderer.retain(wanted_keys)
+            for i, tile, priority in render_jobs:
+                # Looking an entry up also marks it as recently used
+                entry = self.cache.get((i, tile))
+                if force_rerender or entry is None or not entry.sharp:
+                    page_width = self.layout.page_size(i)[0]
+                    scale = self.get_page_scale(page_width)
+                    # Pages with nothing to show yet get a quick low resolution pass first,
+                    # unless the sharp page can be read from the disk cache
+                    if entry is None and tile is None and priority == PRIORITY_VISIBLE and \
+                            not (self.disk_cache and self.disk_cache.contains(i, scale, self.rotation)):
+                        self.renderer.render(i, scale, self.rotation, PRIORITY_PREVIEW, preview=True)
+                    if not flinging:
+                        self.renderer.render(i, scale, self.rotation, priority, tile)
+
         self._update_current_page_from_scroll()
 
-    def _manage_cache(self, visible_indices: set):
-        if len(self.cache) > len(visible_indices) + CACHE_SIZE_LIMIT:
-            keys_to_remove = [k for k in self.cache_keys if k not in visible_indices][:CACHE_SIZE_LIMIT]
-            for key in keys_to_remove:
-                if key in self.cache:
-                    del self.cache[key]
-                if key in self.cache_keys:
-                    self.cache_keys.remove(key)
-                self.canvas.itemconfig(self.canvas_items[key], image=self.placeholder)
+    def _on_scroll_settled(self):
+        """Renders the pages the view came to rest on in full quality after a fling."""
+        self._settle_after = None
+        self.request_render_visible_pages()
+
+    def _count_prefetch_hits(self, shown):
+        """Counts, for each page that came into view, whether its sharp image was ready."""
+        for i in shown:
+            if i not in self._shown_pages and not needs_tiling(*self.page_dims[i]):
+                entry = self.cache.peek((i, None))
+                self.scroll_tracker.count_arrival(entry is not None and entry.sharp)
+        self._shown_pages = shown
 
     def _update_current_page_from_scroll(self):
+        if not self.page_positions:
+            return
         y_center = self.canvas.canvasy(0) + self.canvas.winfo_height() / 2
-        for i, pos in reversed(list(enumerate(self.page_positions))):
-            if y_center >= pos:
-                if self.current_page != i:
-                    self.current_page = i
-                    self.update_statusbar()
-                break
+        i = self.layout.page_at(y_center)
+        if self.current_page != i:
+            self.current_page = i
+            self.update_statusbar()
+            self.mark_current_thumbnail()
 
     def scroll_to_page(self, page_index: int):
         if not self.pdf_model or not self.page_positions or page_index >= len(self.page_positions):
@@ -168,6 +709,8 @@ class PdfApplication(View):
         if total_height > 0:
             y = self.page_positions[page_index]
             self.canvas.yview_moveto(y / total_height)
+        # A jump is not a scroll, the target page is rendered right away
+        self.scroll_tracker.reset()
         self.request_render_visible_pages()
 
     def prev_page(self):
@@ -187,29 +730,89 @@ class PdfApplication(View):
             pass
 
     def _on_resize(self, event=None):
-        if self.fit_to_width and self.pdf_model:
+        if not self.pdf_model:
+            return
+        if self.fit_to_width and (event is None or event.width != self._layout_width):
             self._relayout_and_rerender()
+        else:
+            # Only the height changed, the layout still fits
+            self.request_render_visible_pages()
 
     def _on_mousewheel(self, event):
         delta = event.delta if hasattr(event, "delta") else (120 if event.num == 4 else -120)
         self.canvas.yview_scroll(-1 * (delta // 120), "units")
+        self.scroll_tracker.record(self.canvas.canvasy(0))
         self.request_render_visible_pages()
 
     def _relayout_and_rerender(self):
+        """
+        Asks for a relayout after a resize or zoom. Bursts of events (dragging
+        the window edge, repeated zoom clicks) are merged into one layout pass
+        that runs once no new event arrived for RELAYOUT_DEBOUNCE_MS. Until then
+        the pages on screen are stretched to the new size, at most every
+        RELAYOUT_PREVIEW_MS; the layout, the cache and the render work are
+        left alone.
+        """
+        metrics.count("ui.relayout_events")
         for item in self.search_highlight_items:
             self.canvas.delete(item)
         self.search_highlight_items.clear()
-        self.after(50, self._clear_cache_and_rerender)
-
-    def _clear_cache_and_rerender(self):
+        self.update_statusbar()
+        now = time.perf_counter()
+        if now - self._last_relayout_preview >= RELAYOUT_PREVIEW_MS / 1000:
+            self._last_relayout_preview = now
+            self._preview_relayout()
+        if self._relayout_after:
+            self.after_cancel(self._relayout_after)
+        self._relayout_after = self.after(RELAYOUT_DEBOUNCE_MS, self._rescale_and_rerender)
+
+    @metrics.timed("ui.relayout_preview")
+    def _preview_relayout(self):
+        """
+        Stretches the images of the visible pages by the ratio of their new to
+        their laid out width, anchored at the top of the current page. Only the
+        canvas items change; tiles are hidden until the relayout drops them.
+        """
+        from PIL import Image, ImageTk
+        if not self.pdf_model or not self.page_positions:
+            return
+        metrics.count("ui.relayout_previews")
+        self.canvas.itemconfig("tile", state="hidden")
+        canvas_w = self.canvas.winfo_width()
+        y0 = self.canvas.canvasy(0)
+        visible = self.layout.visible_range(y0, y0 + self.canvas.winfo_height())
+        if not visible:
+            return
+        anchor = self.page_positions[self.current_page]
+        old_w = self.page_dims[self.current_page][0]
+        page_w = self.layout.page_size(self.current_page)[0]
+        ratio = self.get_page_scale(page_w) * page_w / old_w if old_w else 1.0
+        for page_index in range(visible[0], visible[1] + 1):
+            item = self.page_items.get(page_index)
+            entry = self.cache.peek((page_index, None))
+            if item is None or entry is None:
+                continue
+            w, h = self.page_dims[page_index]
+            size = (max(round(w * ratio), 1), max(round(h * ratio), 1))
+            img = ImageTk.PhotoImage(ImageTk.getimage(entry.image).resize(size, Image.BILINEAR))
+            # The canvas does not keep a reference to the image
+            self._preview_images[page_index] = img
+            self.canvas.itemconfig(item, image=img)
+            self.canvas.coords(item, max((canvas_w - size[0]) // 2, 0),
+                               anchor + (self.page_positions[page_index] - anchor) * ratio)
+
+    def _rescale_and_rerender(self):
+        self._relayout_after = None
         if not self.pdf_model:
+            self._preview_images.clear()
             return
         if self.renderer:
-            # Clear pending render jobs by creating a new queue
-            self.renderer.render_queue = queue.Queue()
-        self.cache.clear()
-        self.cache_keys.clear()
+            # Drop pending render jobs, and results still in flight, for the old zoom
+            self.renderer.new_generation()
         self._precalculate_layout()
+        # Gives the items their rescaled images, the stretched ones can go
+        self._rescale_cached_pages()
+        self._preview_images.clear()
         self.request_render_visible_pages(force_rerender=True)
         self.after(50, lambda: self.scroll_to_page(self.current_page))
 
@@ -236,31 +839,77 @@ class PdfApplication(View):
         if not self.pdf_model:
             return
         if self.renderer:
-            self.renderer.render_queue = queue.Queue()
-        self.cache.clear()
-        self.cache_keys.clear()
-        # No need for full relayout, just re-render
-        self.request_render_visible_pages(force_rerender=True)
+            self.renderer.new_generation()
+        for item in self.search_highlight_items:
+            self.canvas.delete(item)
+        self.search_highlight_items.clear()
+        # Rotation is a layout transform: at 90° and 270° pages swap width and height
+        self.layout.rotation = self.rotation
+        self._precalculate_layout()
+        self._rotate_cached_pages()
+        # Only pages without a sharp rotated bitmap are rendered again
+        self.scroll_to_page(self.current_page)
         self.update_statusbar()
 
     def _search_event(self, event=None):
+        from searcher import SearchWorker
+        from text_index import TextIndexBuilder
         term = self.search_entry.get()
         if not term:
+            self._cancel_search()
             self.clear_search()
             return
+        if not self.pdf_model:
+            return
         if term != self.search_term:
+            self._cancel_search()
+            self.clear_search(keep_term=True)
             self.search_term = term
-            self.search_results = self.pdf_model.search(self.search_term)
-            if self.search_results:
-                self.current_search_hit = -1
-                self.search_prev_btn.config(state=tk.NORMAL)
-                self.search_next_btn.config(state=tk.NORMAL)
-            else:
-                self.clear_search(keep_term=True)
+            self.current_search_hit = -1
             self.search_active = True
-            self.update_statusbar()
+            # Fresh queue so hits from the cancelled search are never shown
+            self.search_queue = NotifyingQueue(self.notifier)
+
+            self.search_progress = 0
+            if self.pdf_model.load_text_index():
+                self.search_worker = SearchWorker(self.pdf_model.filepath, term, self.page_count, self.search_queue,
+                                                  index_path=self.pdf_model.text_index.path)
+            else:
+                self.search_worker = SearchWorker(self.pdf_model.filepath, term, self.page_count, self.search_queue)
+                # Index the text once in the background so later searches are instant
+                index_path = self.pdf_model.text_index_path()
+                if index_path and (not self.index_builder or not self.index_builder.is_alive()):
+                    self.index_builder = TextIndexBuilder(self.pdf_model.filepath, self.page_count, index_path)
+            self._apply_search_results()
+            return
         self._next_search_hit()
 
+    def _cancel_search(self):
+        if self.search_worker:
+            self.search_worker.stop()
+            self.search_worker = None
+        self.search_progress = None
+
+    def _apply_search_results(self):
+        """Adds hits streamed by the search worker, jumping to the first one as soon as it arrives."""
+        had_results = bool(self.search_results)
+        while not self.search_queue.empty():
+            kind, value = self.search_queue.get_nowait()
+            if kind == "hits":
+                self.search_results.extend(value)
+            elif kind == "progress":
+                self.search_progress = value
+            elif kind == "done":
+                self.search_worker = None
+                self.search_progress = None
+
+        if self.search_results and not had_results:
+            self.search_prev_btn.config(state=tk.NORMAL)
+            self.search_next_btn.config(state=tk.NORMAL)
+            self._next_search_hit()
+        else:
+            self.update_statusbar()
+
 
     def _prev_search_hit(self):
         if not self.search_results:
@@ -0,0 +1,50 @@
+# benchmarks/bench_disk_cache.py
+"""
+Compares painting a page from the disk page cache with rasterizing it again,
+for a dense vector drawing (the CAD case) and a plain text page. Both paths
+end with the PPM data the view turns into a PhotoImage.
+
+    python benchmarks/bench_disk_cache.py [zoom]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from synthetic import text_pdf, vector_pdf
+import fitz  # PyMuPDF
+from disk_cache import DiskPageCache
+from render_pool import render_pixmap
+
+ROUNDS = 5
+
+
+def main():
+    zoom = float(sys.argv[1]) if len(sys.argv) > 1 else 1.5
+    root = tempfile.mkdtemp(prefix="pdfviewer_bench_")
+    print(f"{'document':>10} {'render ms':>10} {'disk ms':>8} {'file KB':>8}")
+    for name, path in (("vector", vector_pdf(1)), ("text", text_pdf(1))):
+        doc = fitz.open(path)
+        page = doc.load_page(0)
+        start = time.perf_counter()
+        for _ in range(ROUNDS):
+            data = render_pixmap(page, zoom, 0).tobytes("ppm")
+        render_ms = (time.perf_counter() - start) / ROUNDS * 1000
+
+        cache = DiskPageCache(root, name)
+        cache.put(0, zoom, 0, None, data)
+        cache.close()  # Waits for the write
+        # A new session finds the page on disk
+        cache = DiskPageCache(root, name)
+        start = time.perf_counter()
+        for _ in range(ROUNDS):
+            assert cache.get(0, zoom, 0) == data
+        disk_ms = (time.perf_counter() - start) / ROUNDS * 1000
+        size_kb = os.path.getsize(os.path.join(cache.directory, os.listdir(cache.directory)[0])) / 1024
+        print(f"{name:>10} {render_ms:>10.1f} {disk_ms:>8.1f} {size_kb:>8.0f}")
+        cache.close()
+        doc.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# benchmarks/bench_display_list.py
+"""
+Measures what the display list cache saves when a page is rendered again:
+a series of zoom steps on the same page, and the tiles of one large page,
+rendered from the page each time (parsing its content stream for every
+request) and from a cached display list.
+
+    python benchmarks/bench_display_list.py [lines_per_page]
+"""
+import sys
+import time
+
+from synthetic import text_pdf, vector_pdf
+import fitz  # PyMuPDF
+from config import DISPLAY_LIST_MEMORY_BUDGET, TILE_SIZE
+from page_cache import PageCache
+from render_pool import load_display_list, render_pixmap
+from tiles import tiles_in_region
+
+# The zoom steps of a few clicks on the zoom buttons
+ZOOMS = (1.0, 1.2, 1.44, 1.2, 1.0, 0.83)
+# Zoom of the tiled page
+TILE_ZOOM = 4.0
+
+
+def render_all(doc, requests, cached):
+    """Renders (zoom, tile) requests of page 0. Returns the time in ms."""
+    cache = PageCache(DISPLAY_LIST_MEMORY_BUDGET)
+    start = time.perf_counter()
+    for zoom, tile in requests:
+        if cached:
+            page = load_display_list(doc, 0, cache, 0)
+        else:
+            page = doc.load_page(0)
+        render_pixmap(page, zoom, 0, tile)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print(f"{'document':>10} {'case':>6} {'renders':>8} {'uncached ms':>12} {'cached ms':>10} {'speedup':>8}")
+    for name, path in (("vector", vector_pdf(1, lines)), ("text", text_pdf(1))):
+        doc = fitz.open(path)
+        rect = doc.load_page(0).rect
+        # Fonts and images are loaded once per document, keep that out of both paths
+        render_pixmap(doc.load_page(0), 0.1, 0)
+        width, height = int(rect.width * TILE_ZOOM), int(rect.height * TILE_ZOOM)
+        cases = (
+            ("zoom", [(zoom, None) for zoom in ZOOMS]),
+            ("tiles", [(TILE_ZOOM, tile) for tile in tiles_in_region(width, height, 0, 0, width, height)]),
+        )
+        for case, requests in cases:
+            uncached = render_all(doc, requests, cached=False)
+            cached = render_all(doc, requests, cached=True)
+            print(f"{name:>10} {case:>6} {len(requests):>8} {uncached:>12.1f} {cached:>10.1f} "
+                  f"{uncached / cached:>7.2f}x")
+        doc.close()
+    print(f"(tiles of {TILE_SIZE} px at zoom {TILE_ZOOM})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# benchmarks/bench_layout.py
+"""
+Measures time-to-first-page against page count: the time from opening a
+document until the pages of the first viewport are known and can be rendered.
+
+Compares the eager layout (reading every page size up front) with the lazy
+PageLayout, which only samples the first page, and with a warm open that maps
+the stored page geometry index.
+
+    python benchmarks/bench_layout.py [page_count ...]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from synthetic import text_pdf
+from pdf_model import PDFModel
+from layout import PageLayout, PAGE_MARGIN_TOP, PAGE_SPACING
+
+VIEWPORT_WIDTH, VIEWPORT_HEIGHT = 1200, 900
+
+
+def scale_for_width(width: float) -> float:
+    return VIEWPORT_WIDTH / width
+
+
+def eager_first_page(path: str) -> float:
+    start = time.perf_counter()
+    model = PDFModel(path)
+    total_height = PAGE_MARGIN_TOP
+    for i in range(model.page_count):
+        rect = model.get_page_size(i)
+        total_height += int(rect.height * scale_for_width(rect.width)) + PAGE_SPACING
+    elapsed = time.perf_counter() - start
+    model.close()
+    return elapsed
+
+
+def lazy_first_page(path: str) -> float:
+    start = time.perf_counter()
+    model = PDFModel(path)
+    layout = PageLayout(model.page_count, model.estimate_page_size())
+    layout.compute(scale_for_width)
+    layout.visible_range(0, VIEWPORT_HEIGHT)
+    elapsed = time.perf_counter() - start
+    model.close()
+    return elapsed
+
+
+def warm_first_page(path: str) -> float:
+    model = PDFModel(path)
+    if model.load_geometry() is None:
+        sizes = [model.get_page_size(i) for i in range(model.page_count)]
+        model.save_geometry([(r.width, r.height) for r in sizes], [0] * model.page_count)
+    model.close()
+
+    start = time.perf_counter()
+    model = PDFModel(path)
+    layout = PageLayout.from_geometry(model.load_geometry())
+    layout.compute(scale_for_width)
+    layout.visible_range(0, VIEWPORT_HEIGHT)
+    elapsed = time.perf_counter() - start
+    model.close()
+    return elapsed
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [100, 1000, 10000, 20000]
+    # Geometry indexes go to a cache of their own, never the user's, and the warm opens use the ones made here
+    cache_root = tempfile.mkdtemp(prefix="pdfviewer_bench_cache_")
+    os.environ["PDFVIEWER_CACHE_DIR"] = cache_root
+    print(f"{'pages':>8} {'eager ms':>10} {'lazy ms':>10} {'warm ms':>10}")
+    try:
+        for count in counts:
+            path = text_pdf(count, mixed_sizes=True)
+            eager = eager_first_page(path)
+            lazy = lazy_first_page(path)
+            warm = warm_first_page(path)
+            print(f"{count:>8} {eager * 1000:>10.1f} {lazy * 1000:>10.1f} {warm * 1000:>10.1f}")
+    finally:
+        shutil.rmtree(cache_root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
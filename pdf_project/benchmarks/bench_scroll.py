@@ -0,0 +1,66 @@
+# benchmarks/bench_scroll.py
+"""
+Measures the per-scroll cost of the layout lookups against page count: finding
+the visible range and the current page, as done on every mouse wheel tick.
+The old linear scan over the page offsets is timed for comparison. Also times
+a full relayout and the partial relayout after one page changed size.
+
+    python benchmarks/bench_scroll.py [page_count ...]
+"""
+import random
+import sys
+import time
+
+from synthetic import A4, A3_LANDSCAPE
+from layout import PageLayout
+
+VIEWPORT_WIDTH, VIEWPORT_HEIGHT = 1200, 900
+LOOKUPS = 2000
+
+
+def scale_for_width(width: float) -> float:
+    return VIEWPORT_WIDTH / width
+
+
+def linear_current_page(positions, y: float) -> int:
+    for i, pos in reversed(list(enumerate(positions))):
+        if y >= pos:
+            return i
+    return 0
+
+
+def time_per_call(func, args) -> float:
+    """Returns the mean time of func(*a) over `args`, in microseconds."""
+    start = time.perf_counter()
+    for a in args:
+        func(*a)
+    return (time.perf_counter() - start) / len(args) * 1e6
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000, 1000000]
+    print(f"{'pages':>8} {'bisect us':>10} {'linear us':>10} {'full ms':>9} {'1 page ms':>10}")
+    for count in counts:
+        layout = PageLayout(count, A4)
+        start = time.perf_counter()
+        layout.compute(scale_for_width)
+        full_ms = (time.perf_counter() - start) * 1000
+
+        ys = [(random.uniform(0, layout.total_height),) for _ in range(LOOKUPS)]
+        bisect_us = time_per_call(lambda y: (layout.visible_range(y, y + VIEWPORT_HEIGHT),
+                                             layout.page_at(y + VIEWPORT_HEIGHT / 2)), ys)
+        # The linear scan is only sampled, it is far too slow to run thousands of times on big documents
+        linear_us = time_per_call(lambda y: linear_current_page(layout.positions, y), ys[:20])
+
+        # One page in the middle turns out to be larger than estimated
+        page = count // 2
+        changed = layout.update_sizes(page, [(*A3_LANDSCAPE, 0)])
+        start = time.perf_counter()
+        layout.relayout_pages(changed, scale_for_width)
+        partial_ms = (time.perf_counter() - start) * 1000
+
+        print(f"{count:>8} {bisect_us:>10.2f} {linear_us:>10.1f} {full_ms:>9.1f} {partial_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
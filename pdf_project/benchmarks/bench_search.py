@@ -0,0 +1,62 @@
+# benchmarks/bench_search.py
+"""
+Compares search latency of the page-by-page search_for loop with the
+persistent text index, and reports how long building the index takes.
+
+    python benchmarks/bench_search.py [page_count] [term ...]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from synthetic import text_pdf
+from pdf_model import PDFModel
+from text_index import TextIndex, TextIndexBuilder
+
+
+def scan_search(model: PDFModel, term: str) -> list:
+    results = []
+    for i in range(model.page_count):
+        results += [(i, rect) for rect in model.get_page(i).search_for(term)]
+    return results
+
+
+def run(page_count: int, terms: list):
+    model = PDFModel(text_pdf(page_count))
+    path = model.text_index_path()
+
+    start = time.perf_counter()
+    TextIndexBuilder(model.filepath, model.page_count, path).join()
+    print(f"index build: {time.perf_counter() - start:.2f} s")
+    index = TextIndex.load(path, model.page_count)
+
+    print(f"{'term':>12} {'hits':>7} {'scan ms':>10} {'index ms':>10}")
+    for term in terms:
+        start = time.perf_counter()
+        scanned = scan_search(model, term)
+        scan_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        indexed = index.search(term)
+        index_ms = (time.perf_counter() - start) * 1000
+        hits = f"{len(indexed)}" if len(indexed) == len(scanned) else f"{len(indexed)}/{len(scanned)}"
+        print(f"{term!r:>12} {hits:>7} {scan_ms:>10.1f} {index_ms:>10.2f}")
+    index.close()
+    model.close()
+
+
+def main():
+    page_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    terms = sys.argv[2:] or ["Page 1234", "of", "page 4", "missing"]
+    # The index is built in a cache of its own, never in the user's cache or from an earlier run
+    cache_root = tempfile.mkdtemp(prefix="pdfviewer_bench_cache_")
+    os.environ["PDFVIEWER_CACHE_DIR"] = cache_root
+    try:
+        run(page_count, terms)
+    finally:
+        shutil.rmtree(cache_root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# benchmarks/bench_startup.py
+"""
+Measures cold start: the time from launching `python main.py document.pdf`
+until the window is painted and until the first sharp page is on screen.
+The viewer reports both milestones and exits when it is started with the
+PDFVIEWER_STARTUP_PROBE environment variable.
+
+Needs a display; on Linux without one it runs under xvfb-run if installed.
+The first run of each document starts with empty caches, later runs are warm.
+
+    python benchmarks/bench_startup.py [runs] [page_count]
+"""
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from synthetic import text_pdf, vector_pdf
+
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+TIMEOUT = 60
+
+
+def launch(path: str, env: dict) -> dict:
+    """Starts the viewer once. Returns the milestones in ms after the launch."""
+    command = [sys.executable, MAIN, path]
+    if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+        command = ["xvfb-run", "-a"] + command
+    start = time.time()
+    out = subprocess.run(command, env=env, capture_output=True, text=True, timeout=TIMEOUT).stdout
+    milestones = {}
+    for line in out.splitlines():
+        parts = line.split()
+        if len(parts) == 3 and parts[0] == "startup":
+            milestones[parts[1]] = (float(parts[2]) - start) * 1000
+    return milestones
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    page_count = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    if sys.platform.startswith("linux") and not os.environ.get("DISPLAY") and not shutil.which("xvfb-run"):
+        print("No display and no xvfb-run, cannot start the viewer")
+        return 1
+
+    env = dict(os.environ, PDFVIEWER_STARTUP_PROBE="1")
+    print(f"{'document':>10} {'run':>5} {'window ms':>10} {'first page ms':>14}")
+    for name, path in (("text", text_pdf(page_count, mixed_sizes=True)), ("vector", vector_pdf(1))):
+        env["PDFVIEWER_CACHE_DIR"] = tempfile.mkdtemp(prefix="pdfviewer_bench_cache_")
+        warm = []
+        for run in range(runs):
+            milestones = launch(path, env)
+            window, first_page = milestones.get("window"), milestones.get("first_page")
+            if window is None or first_page is None:
+                print(f"{name:>10} {run + 1:>5} did not report, is a display available?")
+                continue
+            print(f"{name:>10} {'cold' if run == 0 else run + 1:>5} {window:>10.0f} {first_page:>14.0f}")
+            if run:
+                warm.append((window, first_page))
+        if warm:
+            print(f"{name:>10} {'warm':>5} {statistics.median(w for w, _ in warm):>10.0f} "
+                  f"{statistics.median(f for _, f in warm):>14.0f}  (median)")
+        shutil.rmtree(env["PDFVIEWER_CACHE_DIR"], ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
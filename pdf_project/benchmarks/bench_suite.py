@@ -0,0 +1,288 @@
+# benchmarks/bench_suite.py
+"""
+Runs the headless benchmark suite on synthetic documents and writes the
+results as JSON, so that runs on different commits can be compared.
+
+Documents: 10k text pages, 10k pages of mixed sizes, heavy vector drawings
+and image-only scans. For each it measures opening the document (cold, and
+warm from the stored geometry), the layout pass of the view, RenderWorker
+throughput, and a scripted scroll session; search latency is measured on
+the text document with and without the text index. Nothing needs a display.
+
+    python benchmarks/bench_suite.py [--quick] [--output results.json] [--compare baseline.json]
+"""
+import argparse
+import json
+import os
+import platform
+import queue
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from synthetic import text_pdf, vector_pdf, scan_pdf
+import fitz  # PyMuPDF
+from config import RENDER_BUFFER_PAGES, RENDER_PROCESSES
+from layout import PageLayout, PageSizeScanner
+from pdf_model import PDFModel
+from prefetch import ScrollTracker
+from render_pool import default_process_count
+from renderer import RenderWorker
+from scheduler import PRIORITY_VISIBLE, PRIORITY_AHEAD
+from text_index import TextIndexBuilder
+
+VIEWPORT_WIDTH, VIEWPORT_HEIGHT = 1200, 900
+# name: (create document, page count, page count with --quick)
+DOCUMENTS = {
+    "text": (text_pdf, 10000, 1000),
+    "mixed": (lambda n: text_pdf(n, mixed_sizes=True), 10000, 1000),
+    "vector": (vector_pdf, 20, 4),
+    "scan": (scan_pdf, 200, 20),
+}
+# Pages rendered for the throughput measurement (fewer for --quick)
+RENDER_PAGES, RENDER_PAGES_QUICK = 40, 8
+# Scripted scroll session: constant speed in pages per second, for this long
+SCROLL_PAGES_PER_SECOND = 3.0
+SCROLL_SECONDS, SCROLL_SECONDS_QUICK = 8.0, 3.0
+SCROLL_TICK = 1 / 60
+SEARCH_TERMS = ("Page 1234", "of", "missing")
+
+
+def scale_for_width(width: float) -> float:
+    return VIEWPORT_WIDTH / width
+
+
+def elapsed_ms(start: float) -> float:
+    return (time.perf_counter() - start) * 1000
+
+
+def bench_open(path: str) -> dict:
+    """Time to the first laid out viewport, cold (estimated sizes) and warm (stored geometry)."""
+    start = time.perf_counter()
+    model = PDFModel(path)
+    layout = PageLayout(model.page_count, model.estimate_page_size())
+    layout.compute(scale_for_width)
+    layout.visible_range(0, VIEWPORT_HEIGHT)
+    cold = elapsed_ms(start)
+
+    # Read the real page sizes the way the viewer does in the background, and store them
+    start = time.perf_counter()
+    sizes = queue.Queue()
+    PageSizeScanner(path, model.page_count, sizes).join()
+    while not sizes.empty():
+        layout.update_sizes(*sizes.get_nowait())
+    model.save_geometry(layout.sizes, layout.rotations)
+    scan = elapsed_ms(start)
+    model.close()
+
+    start = time.perf_counter()
+    model = PDFModel(path)
+    layout = PageLayout.from_geometry(model.load_geometry())
+    layout.compute(scale_for_width)
+    layout.visible_range(0, VIEWPORT_HEIGHT)
+    warm = elapsed_ms(start)
+    model.close()
+    return {"open_cold_ms": cold, "geometry_scan_ms": scan, "open_warm_ms": warm}
+
+
+def bench_layout(path: str) -> dict:
+    """The layout pass of the view: a full relayout (zoom, resize) and one page changing size."""
+    model = PDFModel(path)
+    layout = PageLayout.from_geometry(model.load_geometry())
+    start = time.perf_counter()
+    layout.compute(scale_for_width)
+    full = elapsed_ms(start)
+    page = model.page_count // 2
+    width, height = layout.sizes[page]
+    changed = layout.update_sizes(page, [(height, width, 0)])
+    start = time.perf_counter()
+    layout.relayout_pages(changed, scale_for_width)
+    partial = elapsed_ms(start)
+    model.close()
+    return {"layout_full_ms": full, "layout_one_page_ms": partial}
+
+
+def bench_render(path: str, pages: int, processes: int) -> float:
+    """Renders the first pages at fit-to-width zoom. Returns pages per second."""
+    model = PDFModel(path)
+    pages = min(pages, model.page_count)
+    results = queue.Queue()
+    worker = RenderWorker(model.doc, results, processes=processes)
+    start = time.perf_counter()
+    for i in range(pages):
+        worker.render(i, scale_for_width(model.get_page_size(i).width), 0)
+    for _ in range(pages):
+        results.get()
+    rate = pages / (time.perf_counter() - start)
+    worker.stop()
+    worker.join()
+    model.close()
+    return rate
+
+
+def bench_scroll(path: str, seconds: float) -> dict:
+    """
+    Scrolls through the document at a constant speed and drives the renderer
+    like the view does on every tick: the visible pages plus the prefetch
+    window of the scroll velocity. Measures how many pages were sharp when
+    they came into view, and how long the others took.
+    """
+    model = PDFModel(path)
+    layout = PageLayout.from_geometry(model.load_geometry())
+    layout.compute(scale_for_width)
+    results = queue.Queue()
+    worker = RenderWorker(model.doc, results, processes=RENDER_PROCESSES)
+    tracker = ScrollTracker()
+    page_height = layout.total_height / max(model.page_count, 1)
+    speed = SCROLL_PAGES_PER_SECOND * page_height
+
+    # Pages with a render, when each page came into view, and the pages shown before their render
+    ready, seen_at, waiting = set(), {}, set()
+    waits = []
+    start = time.perf_counter()
+    while True:
+        now = time.perf_counter()
+        if now - start > seconds:
+            break
+        y = min(speed * (now - start), max(layout.total_height - VIEWPORT_HEIGHT, 0))
+        tracker.record(y, now)
+        first, last = layout.visible_range(y, y + VIEWPORT_HEIGHT)
+        ahead, behind = tracker.prefetch_extent(RENDER_BUFFER_PAGES, page_height, now)
+        window = range(max(first - behind, 0), min(last + ahead, model.page_count - 1) + 1)
+        worker.retain((i, None) for i in window)
+        for i in window:
+            visible = first <= i <= last
+            if visible and i not in seen_at:
+                seen_at[i] = now
+                if i not in ready:
+                    waiting.add(i)
+            if i not in ready:
+                scale = scale_for_width(layout.sizes[i][0])
+                worker.render(i, scale, 0, PRIORITY_VISIBLE if visible else PRIORITY_AHEAD)
+        while not results.empty():
+            page_index = results.get_nowait().job.page_index
+            ready.add(page_index)
+            if page_index in waiting:
+                waiting.remove(page_index)
+                waits.append((time.perf_counter() - seen_at[page_index]) * 1000)
+        time.sleep(max(SCROLL_TICK - (time.perf_counter() - now), 0))
+
+    end = time.perf_counter()
+    worker.stop()
+    worker.join()
+    model.close()
+    # Pages still blank at the end count with the time they have waited so far
+    misses = sorted(waits + [(end - seen_at[i]) * 1000 for i in waiting])
+    shown = len(seen_at)
+    return {
+        "scroll_pages_shown": shown,
+        "scroll_hit_rate": (shown - len(misses)) / shown if shown else 0.0,
+        "scroll_wait_mean_ms": sum(misses) / len(misses) if misses else 0.0,
+        "scroll_wait_p95_ms": misses[int(len(misses) * 0.95)] if misses else 0.0,
+    }
+
+
+def bench_search(path: str) -> dict:
+    """Search latency by scanning every page, the index build time, and latency with the index."""
+    model = PDFModel(path)
+    metrics = {}
+    for term in SEARCH_TERMS:
+        start = time.perf_counter()
+        model.search(term)
+        metrics[f"search_scan_ms[{term}]"] = elapsed_ms(start)
+    start = time.perf_counter()
+    TextIndexBuilder(model.filepath, model.page_count, model.text_index_path()).join()
+    metrics["index_build_ms"] = elapsed_ms(start)
+    for term in SEARCH_TERMS:
+        start = time.perf_counter()
+        model.search(term)
+        metrics[f"search_index_ms[{term}]"] = elapsed_ms(start)
+    model.close()
+    return metrics
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(quick: bool) -> dict:
+    processes = default_process_count(RENDER_PROCESSES)
+    results = {}
+    for name, (create, full_count, quick_count) in DOCUMENTS.items():
+        page_count = quick_count if quick else full_count
+        print(f"{name}: {page_count} pages")
+        path = create(page_count)
+        metrics = {"pages": page_count}
+        metrics.update(bench_open(path))
+        metrics.update(bench_layout(path))
+        render_pages = RENDER_PAGES_QUICK if quick else RENDER_PAGES
+        metrics["render_thread_pages_per_s"] = bench_render(path, render_pages, 1)
+        if processes > 1:
+            metrics["render_pool_pages_per_s"] = bench_render(path, render_pages, processes)
+        if name != "vector":
+            # Vector pages take far longer to render than a scroll tick; there is nothing to prefetch
+            metrics.update(bench_scroll(path, SCROLL_SECONDS_QUICK if quick else SCROLL_SECONDS))
+        if name == "text":
+            metrics.update(bench_search(path))
+        results[name] = metrics
+        for key, value in metrics.items():
+            print(f"  {key:>32} {value:>10.3f}" if isinstance(value, float) else f"  {key:>32} {value:>10}")
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "quick": quick,
+            "python": platform.python_version(),
+            "pymupdf": fitz.VersionBind,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "render_processes": processes,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict):
+    """Prints every metric next to its baseline value with the relative change."""
+    print(f"\nCompared with {baseline['meta']['commit']} ({baseline['meta']['time']}):")
+    for name, metrics in current["results"].items():
+        old_metrics = baseline["results"].get(name, {})
+        for key, value in metrics.items():
+            old = old_metrics.get(key)
+            if not isinstance(old, (int, float)) or not old:
+                continue
+            print(f"  {name:>7} {key:>32} {old:>10.3f} -> {value:>10.3f} {(value - old) / old:>+8.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless benchmark suite of the PDF viewer.")
+    parser.add_argument("--quick", action="store_true", help="smaller documents and shorter sessions")
+    parser.add_argument("--output", default="", help="JSON file for the results")
+    parser.add_argument("--compare", default="", help="JSON results of an earlier run to compare with")
+    args = parser.parse_args()
+
+    # Every run starts from empty caches, so cold and warm mean the same thing on every commit
+    cache_root = tempfile.mkdtemp(prefix="pdfviewer_bench_cache_")
+    os.environ["PDFVIEWER_CACHE_DIR"] = cache_root
+    try:
+        report = run(args.quick)
+    finally:
+        shutil.rmtree(cache_root, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+# benchmarks/synthetic.py
+"""Generates synthetic PDF documents for the benchmarks."""
+import io
+import os
+import random
+import sys
+import tempfile
+
+# The benchmarks import the viewer modules directly, like main.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fitz  # PyMuPDF
+from PIL import Image, ImageDraw
+
+A4 = (595, 842)
+A3_LANDSCAPE = (1191, 842)
+
+
+def text_pdf(page_count: int, mixed_sizes: bool = False) -> str:
+    """
+    Creates a PDF with one line of text per page and returns its path.
+    With `mixed_sizes`, every tenth page is A3 landscape instead of A4.
+    Files are cached in the temp directory between runs.
+    """
+    suffix = "mixed" if mixed_sizes else "a4"
+    path = os.path.join(tempfile.gettempdir(), f"pdfviewer_bench_{page_count}_{suffix}.pdf")
+    if os.path.exists(path):
+        return path
+
+    doc = fitz.open()
+    for i in range(page_count):
+        width, height = A3_LANDSCAPE if mixed_sizes and i % 10 == 9 else A4
+        page = doc.new_page(width=width, height=height)
+        page.insert_text((72, 72), f"Page {i + 1} of {page_count}")
+    doc.save(path, garbage=1)
+    doc.close()
+    return path
+
+
+def vector_pdf(page_count: int, lines_per_page: int = 20000) -> str:
+    """
+    Creates a PDF whose pages are dense line drawings, like CAD plans, and
+    returns its path. Files are cached in the temp directory between runs.
+    """
+    path = os.path.join(tempfile.gettempdir(), f"pdfviewer_bench_{page_count}_vector{lines_per_page}.pdf")
+    if os.path.exists(path):
+        return path
+
+    rng = random.Random(page_count)
+    doc = fitz.open()
+    for _ in range(page_count):
+        page = doc.new_page(width=A3_LANDSCAPE[0], height=A3_LANDSCAPE[1])
+        shape = page.new_shape()
+        for _ in range(lines_per_page):
+            x, y = rng.uniform(0, A3_LANDSCAPE[0]), rng.uniform(0, A3_LANDSCAPE[1])
+            shape.draw_line((x, y), (x + rng.uniform(-40, 40), y + rng.uniform(-40, 40)))
+        shape.finish(width=0.3, color=(0, 0, 0))
+        shape.commit()
+    doc.save(path, garbage=1, deflate=True)
+    doc.close()
+    return path
+
+
+def scan_pdf(page_count: int, dpi: int = 150) -> str:
+    """
+    Creates a PDF of image-only pages, like a scanned book, and returns its
+    path. Each page is an A4 grayscale JPEG of `dpi` with blocks of "text";
+    a handful of distinct images is cycled, but every page stores its own copy.
+    Files are cached in the temp directory between runs.
+    """
+    path = os.path.join(tempfile.gettempdir(), f"pdfviewer_bench_{page_count}_scan{dpi}.pdf")
+    if os.path.exists(path):
+        return path
+
+    rng = random.Random(page_count)
+    size = (A4[0] * dpi // 72, A4[1] * dpi // 72)
+    images = []
+    for _ in range(min(page_count, 8)):
+        img = Image.new("L", size, 235)
+        draw = ImageDraw.Draw(img)
+        for y in range(size[1] // 12, size[1] * 11 // 12, dpi // 6):
+            x = size[0] // 10
+            while x < size[0] * 9 // 10:
+                word = rng.randint(dpi // 20, dpi // 4)
+                draw.rectangle((x, y, x + word, y + dpi // 12), fill=rng.randint(20, 80))
+                x += word + dpi // 20
+        buffer = io.BytesIO()
+        img.save(buffer, "JPEG", quality=75)
+        images.append(buffer.getvalue())
+
+    doc = fitz.open()
+    for i in range(page_count):
+        page = doc.new_page(width=A4[0], height=A4[1])
+        page.insert_image(page.rect, stream=images[i % len(images)])
+    doc.save(path, garbage=1)
+    doc.close()
+    return path
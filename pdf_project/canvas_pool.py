@@ -0,0 +1,65 @@
+# canvas_pool.py
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class CanvasItemPool:
+    """
+    Recycled canvas image items for the pages near the viewport.
+
+    Only the pages in the current window (the visible pages plus the render
+    buffer) have a canvas item. When a page leaves the window its item is
+    hidden and handed to the next page that enters it. The number of items
+    therefore depends on how many pages fit around the viewport, never on the
+    page count. The scroll region is set from the layout alone.
+    """
+    def __init__(self, canvas, placeholder, anchor: str = "nw"):
+        self.canvas = canvas
+        self.placeholder = placeholder
+        self.anchor = anchor
+        self._items: Dict[int, int] = {}
+        self._free: List[int] = []
+
+    def __len__(self) -> int:
+        """Number of canvas items owned by the pool, in use or free."""
+        return len(self._items) + len(self._free)
+
+    def get(self, page_index: int) -> Optional[int]:
+        """Returns the canvas item showing a page, or None if the page is outside the window."""
+        return self._items.get(page_index)
+
+    def items(self) -> Iterator[Tuple[int, int]]:
+        return iter(self._items.items())
+
+    def show(self, pages: range, image_for: Callable[[int], object],
+             position_for: Callable[[int], Tuple[float, float]]):
+        """
+        Makes `pages` the window of pages that have an item. Items of pages that
+        left the window are recycled for pages that entered it.
+        """
+        for page_index in [i for i in self._items if i not in pages]:
+            item = self._items.pop(page_index)
+            self.canvas.itemconfig(item, image=self.placeholder, state="hidden")
+            self._free.append(item)
+
+        for page_index in pages:
+            if page_index in self._items:
+                continue
+            if self._free:
+                item = self._free.pop()
+            else:
+                item = self.canvas.create_image(0, 0, anchor=self.anchor, image=self.placeholder, tags=("page",))
+            self.canvas.itemconfig(item, image=image_for(page_index), state="normal")
+            self.canvas.coords(item, *position_for(page_index))
+            # Pages stay below their tiles, the search highlights and markers
+            self.canvas.tag_lower(item)
+            self._items[page_index] = item
+
+    def place(self, position_for: Callable[[int], Tuple[float, float]]):
+        """Moves the items in use to their pages' positions, e.g. after a relayout."""
+        for page_index, item in self._items.items():
+            self.canvas.coords(item, *position_for(page_index))
+
+    def clear(self):
+        """Forgets all items. The caller deletes them from the canvas."""
+        self._items.clear()
+        self._free.clear()
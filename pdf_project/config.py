@@ -29,8 +29,85 @@ THEMES: Dict[str, Dict[str, str]] = {
 }
 
 # --- Application Constants ---
-# Limit for how many rendered pages to keep in memory cache
-CACHE_SIZE_LIMIT: int = 20
+# Memory budget for rendered pages and tiles kept in the cache (bytes)
+CACHE_MEMORY_BUDGET: int = 512 * 1024 * 1024
 
 # Number of pages to render immediately above/below the visible viewport
-RENDER_BUFFER_PAGES: int = 2
\ No newline at end of file
+RENDER_BUFFER_PAGES: int = 2
+
+# While scrolling, prefetch the pages the current scroll speed reaches within this time (seconds)
+PREFETCH_LOOKAHEAD_SECONDS: float = 0.5
+# Upper limit for the pages prefetched ahead of the viewport
+PREFETCH_MAX_PAGES: int = 12
+# Scrolling faster than this many viewport heights per second is a fling: pages
+# passed through only get previews, full quality follows once the view settles
+FLING_VIEWPORTS_PER_SECOND: float = 4.0
+# Time without scrolling after which the view counts as settled (milliseconds)
+SCROLL_SETTLE_MS: int = 150
+# Print the prefetch hit rate every this many pages coming into view
+PREFETCH_LOG_INTERVAL: int = 100
+
+# Pages rendered larger than this many pixels are split into tiles, and only
+# the tiles near the viewport are rendered
+TILE_THRESHOLD_PIXELS: int = 12_000_000
+# Edge length of a tile in pixels
+TILE_SIZE: int = 512
+
+# Previews shown while a page is rendering are rasterized at this fraction of the zoom
+PREVIEW_ZOOM_FACTOR: float = 0.25
+
+# Number of worker processes rendering pages (0 = one per CPU core, 1 = render in a thread)
+RENDER_PROCESSES: int = 0
+# Memory for parsed page content (display lists) kept by each render thread or process (bytes)
+DISPLAY_LIST_MEMORY_BUDGET: int = 64 * 1024 * 1024
+
+# Resize and zoom events are merged into one relayout once no new one arrived for this long (milliseconds)
+RELAYOUT_DEBOUNCE_MS: int = 120
+# Until then, the bitmaps on screen are stretched to the new size at most this often (milliseconds)
+RELAYOUT_PREVIEW_MS: int = 50
+# Polling interval while the document given on the command line is still being opened (milliseconds)
+STARTUP_POLL_MS: int = 10
+# The deferred startup work begins at the window's first paint, or after this long at the latest (milliseconds)
+STARTUP_PAINT_TIMEOUT_MS: int = 500
+
+# Time the UI thread may spend putting rendered images on screen per event loop tick (milliseconds)
+RESULT_TIME_BUDGET_MS: float = 8.0
+
+# --- Thumbnails ---
+# Thumbnails are rendered to fit this box (pixels)
+THUMBNAIL_WIDTH: int = 120
+THUMBNAIL_HEIGHT: int = 160
+# Space around each thumbnail in the sidebar (pixels)
+THUMBNAIL_SPACING: int = 12
+# Thumbnails rendered above/below the visible part of the sidebar
+THUMBNAIL_BUFFER: int = 4
+# New thumbnails are written to the disk cache after this many have been rendered
+THUMBNAIL_SAVE_INTERVAL: int = 64
+
+# --- Persistent Caches ---
+# Name of the per-user cache directory (set PDFVIEWER_CACHE_DIR to override the location)
+CACHE_DIR_NAME: str = "pdfviewer"
+# Disk space for rendered pages kept between sessions, shared by all documents (bytes, 0 = off)
+DISK_CACHE_MAX_BYTES: int = 2 * 1024 * 1024 * 1024
+
+# --- Export ---
+# Resolution of exported page images unless --dpi or --zoom is given
+EXPORT_DPI: int = 150
+# JPEG quality of exported page images (1-100)
+EXPORT_JPEG_QUALITY: int = 90
+# Exported pages between two progress lines
+EXPORT_PROGRESS_INTERVAL: int = 50
+
+# --- Instrumentation (PDFVIEWER_PROFILE=1 or --profile) ---
+# Timed sections kept for the trace file; the oldest are dropped first
+PROFILE_TRACE_EVENTS: int = 200000
+# Recent measurements per section averaged in the overlay
+PROFILE_WINDOW: int = 100
+# Refresh interval of the performance overlay in the status bar (ms)
+PROFILE_OVERLAY_INTERVAL_MS: int = 500
+
+# --- Single instance (--single-instance) ---
+# Later launches hand their file to the running viewer instead of starting another one
+SINGLE_INSTANCE: bool = False
+# Seconds a launch waits for the running viewer to take its file before opening it itself
+INSTANCE_FORWARD_TIMEOUT: float = 2.0
@@ -0,0 +1,168 @@
+# disk_cache.py
+import os
+import queue
+import threading
+import zlib
+from typing import Optional
+
+from config import DISK_CACHE_MAX_BYTES
+from storage import atomic_write
+from tiles import Tile
+
+# Zooms are stored in steps of 0.1%, so the same fit-to-width zoom always finds its pages
+ZOOM_BUCKETS = 1000
+# Pending writes beyond this are dropped rather than holding on to their pixels
+MAX_PENDING_WRITES = 16
+# Eviction removes the least recently used files until the cache is this much of its cap
+EVICT_TO_FRACTION = 0.9
+
+
+def ppm_size(data: bytes):
+    """Returns (width, height, header_length) of binary PPM data."""
+    first = data.index(b"\n")
+    second = data.index(b"\n", first + 1)
+    third = data.index(b"\n", second + 1)
+    width, height = data[first + 1:second].split()
+    return int(width), int(height), third + 1
+
+
+class DiskPageCache:
+    """
+    Second-level cache of rendered pages and tiles on disk, behind the
+    in-memory PageCache, so pages that were rendered in an earlier session
+    are painted without rasterizing them again.
+
+    Each document has a directory named after its fingerprint, holding one
+    file per page (or tile) and zoom bucket and rotation. A file is the PPM
+    data the renderer produces, compressed with zlib at the fastest level.
+
+    Several viewer processes may share the cache. Files are written to a
+    temp file and renamed into place, a file that disappears or is damaged
+    is a miss, and reading a file touches its mtime, which orders the LRU
+    eviction that keeps all documents together under DISK_CACHE_MAX_BYTES.
+    Compressing, writing and evicting happen on a background thread.
+    """
+    def __init__(self, root: str, fingerprint: str, max_bytes: int = DISK_CACHE_MAX_BYTES):
+        self.root = root
+        self.directory = os.path.join(root, fingerprint)
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+        # Names of the files known to exist, so misses never touch the disk
+        self._known = {name for name in os.listdir(self.directory) if not name.startswith(".")}
+        self._writes = queue.Queue(MAX_PENDING_WRITES)
+        self._closing = threading.Event()
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    @staticmethod
+    def _name(page_index: int, zoom: float, rotation: int, tile: Optional[Tile]) -> str:
+        name = f"{page_index}_{round(zoom * ZOOM_BUCKETS)}_{rotation}"
+        if tile is not None:
+            name += "_" + "_".join(str(v) for v in tile)
+        return name + ".ppz"
+
+    def contains(self, page_index: int, zoom: float, rotation: int, tile: Optional[Tile] = None) -> bool:
+        return self._name(page_index, zoom, rotation, tile) in self._known
+
+    def get(self, page_index: int, zoom: float, rotation: int, tile: Optional[Tile] = None) -> Optional[bytes]:
+        """Returns the stored PPM data of a page or tile, or None."""
+        name = self._name(page_index, zoom, rotation, tile)
+        if name not in self._known:
+            return None
+        path = os.path.join(self.directory, name)
+        try:
+            with open(path, "rb") as f:
+                data = zlib.decompress(f.read())
+            width, height, header_length = ppm_size(data)
+            if len(data) != header_length + width * height * 3:
+                raise ValueError("size mismatch")
+            os.utime(path)
+            return data
+        except (OSError, ValueError, zlib.error):
+            # Evicted by another process, or damaged
+            self._known.discard(name)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+    def put(self, page_index: int, zoom: float, rotation: int, tile: Optional[Tile], data: bytes):
+        """Queues PPM data to be stored. Dropped if the writer is behind or the cache is closed."""
+        if self._closing.is_set():
+            return
+        try:
+            self._writes.put_nowait((self._name(page_index, zoom, rotation, tile), data))
+        except queue.Full:
+            pass
+
+    def close(self):
+        """
+        Stops the writer once it has written the queued pages. Does not wait
+        for it, so closing a tab or the viewer never blocks on disk writes;
+        writes cut short at exit leave no partial files (see atomic_write).
+        """
+        self._closing.set()
+        try:
+            self._writes.put_nowait(None)
+        except queue.Full:
+            # The writer stops when it finds the queue empty
+            pass
+
+    def _write_loop(self):
+        total = self._scan_size()
+        # After close() the writer stops at its None, or once the queue is empty if that did not fit
+        while not (self._closing.is_set() and self._writes.empty()):
+            item = self._writes.get()
+            if item is None:
+                break
+            name, data = item
+            compressed = zlib.compress(data, 1)
+            try:
+                atomic_write(os.path.join(self.directory, name), compressed)
+            except OSError as e:
+                print(f"Could not write page cache: {e}")
+                continue
+            self._known.add(name)
+            total += len(compressed)
+            if total > self.max_bytes:
+                total = self._evict()
+
+    def _files(self):
+        """Yields (mtime, size, path) of every cached file of every document."""
+        for doc_dir in os.scandir(self.root):
+            if not doc_dir.is_dir():
+                continue
+            for entry in os.scandir(doc_dir.path):
+                if entry.name.startswith("."):
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                yield st.st_mtime, st.st_size, entry.path
+
+    def _scan_size(self) -> int:
+        try:
+            return sum(size for _, size, _ in self._files())
+        except OSError:
+            return 0
+
+    def _evict(self) -> int:
+        """Removes the least recently used files. Returns the remaining total size."""
+        try:
+            files = sorted(self._files())
+        except OSError:
+            return 0
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= self.max_bytes * EVICT_TO_FRACTION:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            if os.path.dirname(path) == self.directory:
+                self._known.discard(os.path.basename(path))
+        return total
@@ -0,0 +1,155 @@
+# export.py
+"""
+Headless export of PDF pages to PNG or JPEG images, using the viewer's render
+pipeline without the GUI.
+
+    python export.py book.pdf -o out/ --pages 1-100,250 --dpi 200 --format jpeg
+
+Pages are rendered on all cores and written to disk as they finish, with a
+bounded number of pages in flight. Pages whose image already exists are
+skipped, so an interrupted export continues where it stopped.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import List
+
+from config import EXPORT_DPI, EXPORT_JPEG_QUALITY, EXPORT_PROGRESS_INTERVAL, RENDER_PROCESSES
+from pdf_model import PDFModel
+from render_pool import RenderPool, default_process_count, document_key, export_page
+
+# PDF user space units per inch
+POINTS_PER_INCH = 72
+# Jobs handed to the pool per process; bounds the rendered pages held in memory
+JOBS_PER_PROCESS = 2
+
+
+def parse_page_ranges(spec: str, page_count: int) -> List[int]:
+    """
+    Turns a page specification such as "1-10,15,20-" (1-based, inclusive,
+    open ended ranges allowed) into sorted 0-based page indices.
+    """
+    pages = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, _, end = part.partition("-")
+            first = int(start) if start else 1
+            last = int(end) if end else page_count
+        else:
+            first = last = int(part)
+        if first < 1 or last > page_count or first > last:
+            raise ValueError(f"page range {part} outside 1-{page_count}")
+        pages.update(range(first - 1, last))
+    return sorted(pages)
+
+
+def output_path(out_dir: str, stem: str, page_index: int, page_count: int, image_format: str) -> str:
+    """File name of a page image; numbers are zero padded so the files sort in page order."""
+    extension = "jpg" if image_format == "jpeg" else "png"
+    return os.path.join(out_dir, f"{stem}-{page_index + 1:0{len(str(page_count))}d}.{extension}")
+
+
+def export(model: PDFModel, out_dir: str, pages: List[int], zoom: float, rotation: int = 0,
+           image_format: str = "png", jpeg_quality: int = EXPORT_JPEG_QUALITY,
+           processes: int = RENDER_PROCESSES, resume: bool = True) -> int:
+    """Exports pages of a document as images. Returns the number of pages rendered."""
+    filepath, page_count = model.filepath, model.page_count
+    key = document_key(filepath, model.fingerprint)
+    os.makedirs(out_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(filepath))[0]
+
+    jobs = [(i, output_path(out_dir, stem, i, page_count, image_format)) for i in pages]
+    if resume:
+        jobs = [(i, path) for i, path in jobs if not os.path.exists(path)]
+    skipped = len(pages) - len(jobs)
+    if skipped:
+        print(f"Skipping {skipped} pages already exported")
+
+    processes = min(default_process_count(processes), max(len(jobs), 1))
+    start = time.perf_counter()
+    done = 0
+    written = 0
+
+    def report():
+        elapsed = time.perf_counter() - start
+        rate = done / elapsed if elapsed > 0 else 0.0
+        print(f"{done}/{len(jobs)} pages, {rate:.1f} pages/s, {written / (1024 * 1024):.1f} MB written")
+
+    if processes > 1:
+        pool = RenderPool(processes)
+        try:
+            pending = set()
+            remaining = iter(jobs)
+            while True:
+                # Keep every process busy without queueing the whole document
+                for page_index, path in remaining:
+                    pending.add(pool.submit_export(key, page_index, zoom, rotation, path,
+                                                   image_format, jpeg_quality))
+                    if len(pending) >= processes * JOBS_PER_PROCESS:
+                        break
+                if not pending:
+                    break
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    written += future.result()
+                    done += 1
+                    if done % EXPORT_PROGRESS_INTERVAL == 0:
+                        report()
+        finally:
+            pool.shutdown()
+    else:
+        for page_index, path in jobs:
+            written += export_page(key, page_index, zoom, rotation, path, image_format, jpeg_quality)
+            done += 1
+            if done % EXPORT_PROGRESS_INTERVAL == 0:
+                report()
+
+    report()
+    return done
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export PDF pages as PNG or JPEG images.")
+    parser.add_argument("pdf", help="PDF file to export")
+    parser.add_argument("-o", "--output", default=".", help="directory for the page images")
+    parser.add_argument("--pages", default="", help='pages to export, e.g. "1-10,15,20-" (default: all)')
+    scale = parser.add_mutually_exclusive_group()
+    scale.add_argument("--dpi", type=float, help=f"resolution (default: {EXPORT_DPI})")
+    scale.add_argument("--zoom", type=float, help="scale factor, 1.0 = 72 dpi")
+    parser.add_argument("--rotation", type=int, default=0, choices=(0, 90, 180, 270))
+    parser.add_argument("--format", default="png", choices=("png", "jpeg"))
+    parser.add_argument("--quality", type=int, default=EXPORT_JPEG_QUALITY, help="JPEG quality (1-100)")
+    parser.add_argument("-j", "--processes", type=int, default=RENDER_PROCESSES,
+                        help="render processes (default: one per core)")
+    parser.add_argument("--overwrite", action="store_true", help="render pages that were already exported")
+    args = parser.parse_args(argv)
+
+    zoom = args.zoom if args.zoom else (args.dpi or EXPORT_DPI) / POINTS_PER_INCH
+    try:
+        model = PDFModel(args.pdf)
+    except (OSError, RuntimeError) as e:
+        print(f"Failed to open PDF: {e}")
+        return 1
+    try:
+        try:
+            pages = parse_page_ranges(args.pages, model.page_count) if args.pages else list(range(model.page_count))
+        except ValueError as e:
+            print(f"Invalid page range: {e}")
+            return 1
+        export(model, args.output, pages, zoom, args.rotation, args.format, args.quality,
+               args.processes, resume=not args.overwrite)
+    finally:
+        model.close()
+    return 0
+
+
+if __name__ == "__main__":
+    # Required for the render processes when running as a frozen executable
+    multiprocessing.freeze_support()
+    sys.exit(main())
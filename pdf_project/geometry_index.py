@@ -0,0 +1,105 @@
+# geometry_index.py
+import os
+import mmap
+import struct
+import zlib
+from array import array
+from typing import Iterator, Optional, Sequence, Tuple
+
+from storage import atomic_write
+
+# Header: magic, version, page count, source file size, source mtime (ns), payload crc32
+_HEADER = struct.Struct("<8sIIQqI")
+_MAGIC = b"PDFVGEO\0"
+_VERSION = 1
+
+
+class GeometryIndex:
+    """
+    Per-page width, height and rotation of a document, stored on disk.
+
+    The file is a fixed header followed by three packed arrays (float32 widths,
+    float32 heights, uint16 rotations). Loading maps the file into memory, so
+    reading the geometry of a warm document never touches fitz.
+    """
+    def __init__(self, widths: Sequence[float], heights: Sequence[float], rotations: Sequence[int],
+                 mapping: Optional[mmap.mmap] = None):
+        self.widths = widths
+        self.heights = heights
+        self.rotations = rotations
+        self._mapping = mapping
+
+    def __len__(self) -> int:
+        return len(self.widths)
+
+    def page_size(self, page_index: int) -> Tuple[float, float]:
+        return self.widths[page_index], self.heights[page_index]
+
+    def sizes(self) -> Iterator[Tuple[float, float]]:
+        return zip(self.widths, self.heights)
+
+    def close(self):
+        """Releases the memory mapping."""
+        if self._mapping is not None:
+            # Views into the mapping must be released before it can be closed
+            for view in (self.widths, self.heights, self.rotations):
+                if isinstance(view, memoryview):
+                    view.release()
+            self._mapping.close()
+            self._mapping = None
+
+    @classmethod
+    def load(cls, path: str, page_count: int, file_size: int, mtime_ns: int) -> Optional["GeometryIndex"]:
+        """
+        Maps an index file into memory. Returns None if there is no index, or if
+        it is stale or corrupt; a bad file is removed so it gets rebuilt.
+        """
+        try:
+            f = open(path, "rb")
+        except OSError:
+            return None
+
+        with f:
+            try:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                mapping = None
+
+        if mapping is None or not cls._is_valid(mapping, page_count, file_size, mtime_ns):
+            if mapping is not None:
+                mapping.close()
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+        n = page_count
+        view = memoryview(mapping)[_HEADER.size:]
+        widths = view[:4 * n].cast("f")
+        heights = view[4 * n:8 * n].cast("f")
+        rotations = view[8 * n:10 * n].cast("H")
+        view.release()
+        return cls(widths, heights, rotations, mapping)
+
+    @staticmethod
+    def _is_valid(mapping: mmap.mmap, page_count: int, file_size: int, mtime_ns: int) -> bool:
+        if len(mapping) < _HEADER.size:
+            return False
+        magic, version, count, size, mtime, crc = _HEADER.unpack_from(mapping, 0)
+        if magic != _MAGIC or version != _VERSION:
+            return False
+        if count != page_count or size != file_size or mtime != mtime_ns:
+            return False
+        if len(mapping) != _HEADER.size + 10 * count:
+            return False
+        return zlib.crc32(mapping[_HEADER.size:]) == crc
+
+    @staticmethod
+    def save(path: str, widths: Sequence[float], heights: Sequence[float], rotations: Sequence[int],
+             file_size: int, mtime_ns: int):
+        """Writes an index file atomically."""
+        payload = (array("f", widths).tobytes() + array("f", heights).tobytes()
+                   + array("H", rotations).tobytes())
+        header = _HEADER.pack(_MAGIC, _VERSION, len(widths), file_size, mtime_ns, zlib.crc32(payload))
+        atomic_write(path, header + payload)
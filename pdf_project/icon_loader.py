@@ -1,12 +1,12 @@
 import os
 import base64
-from io import BytesIO
-from PIL import Image, ImageTk, ImageDraw
+import tkinter as tk
 from config import ICON_DATA
 
 def load_icons(placeholder):
     """
     Laddar ikoner från disk, base64 eller skapar enkla fallback-ikoner.
+    Tk läser PNG själv, så PIL behöver inte laddas vid start.
     """
     names = ("open", "zoom_in", "zoom_out", "rotate", "search", "up", "down")
     icons = {}
@@ -20,8 +20,7 @@ def load_icons(placeholder):
         path = os.path.join(icons_dir, f"{name}.png")
         if os.path.isfile(path):
             try:
-                pil_img = Image.open(path).convert("RGBA")
-                icon_img = ImageTk.PhotoImage(pil_img)
+                icon_img = tk.PhotoImage(file=path)
             except Exception:
                 pass
 
@@ -33,12 +32,13 @@ def load_icons(placeholder):
                     b64 = b64.decode()
                 b64 = "".join(b64.split())
                 b64 += "=" * ((4 - len(b64) % 4) % 4)
-                decoded = base64.b64decode(b64)
-                pil_img = Image.open(BytesIO(decoded)).convert("RGBA")
-                icon_img = ImageTk.PhotoImage(pil_img)
+                icon_img = tk.PhotoImage(data=base64.b64decode(b64))
             except Exception:
                 pass
 
+        if icon_img is not None:
+            icons[name] = icon_img
+
     # säkerställ att alla nycklar finns
     for k in names:
         if k not in icons:
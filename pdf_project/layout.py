@@ -0,0 +1,220 @@
+# layout.py
+import threading
+import queue
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+import fitz  # PyMuPDF
+
+# Canvas padding above the first page and between consecutive pages (pixels)
+PAGE_MARGIN_TOP = 10
+PAGE_SPACING = 20
+
+
+class PageDims(Sequence):
+    """Read-only (width, height) view over the layout's pixel size arrays."""
+    def __init__(self, widths: array, heights: array):
+        self._widths = widths
+        self._heights = heights
+
+    def __len__(self) -> int:
+        return len(self._widths)
+
+    def __getitem__(self, page_index: int) -> Tuple[int, int]:
+        return self._widths[page_index], self._heights[page_index]
+
+
+class PageLayout:
+    """
+    Vertical layout of every page in the document.
+
+    Page sizes start out as an estimate (usually the size of the first page)
+    and are corrected as the real sizes are read, so a layout can be built
+    without loading every page of the document.
+
+    Pixel sizes and y-offsets are kept in flat arrays; `positions` is the
+    prefix sum of the page heights plus spacing, so finding the page at a y
+    position is a binary search.
+
+    The view rotation is part of the layout: at 90° and 270° every page is
+    laid out with its width and height swapped.
+    """
+    def __init__(self, page_count: int, estimate: Tuple[float, float]):
+        self.page_count = page_count
+        self.estimate = estimate
+        self.sizes: List[Tuple[float, float]] = [estimate] * page_count
+        self.rotations: List[int] = [0] * page_count
+        self.known = bytearray(page_count)
+        self.known_count = 0
+        self.rotation = 0
+        self.widths = array("q")
+        self.heights = array("q")
+        # Height of each page plus the spacing below it, the terms of the prefix sum
+        self._steps = array("q")
+        self.dims = PageDims(self.widths, self.heights)
+        self.positions = array("q")
+        self.total_height = PAGE_MARGIN_TOP
+        self.max_width = 0
+
+    def page_size(self, page_index: int) -> Tuple[float, float]:
+        """Returns the (possibly estimated) size of a page in PDF points, as displayed at the view rotation."""
+        width, height = self.sizes[page_index]
+        return (height, width) if self.rotation % 180 else (width, height)
+
+    def is_complete(self) -> bool:
+        """True once the real size of every page is known."""
+        return self.known_count == self.page_count
+
+    @classmethod
+    def from_geometry(cls, geometry) -> "PageLayout":
+        """Creates a fully known layout from a stored GeometryIndex."""
+        layout = cls(len(geometry), geometry.page_size(0) if len(geometry) else (0.0, 0.0))
+        layout.sizes = list(geometry.sizes())
+        layout.rotations = list(geometry.rotations)
+        layout.known = bytearray(b"\x01") * layout.page_count
+        layout.known_count = layout.page_count
+        return layout
+
+    def update_sizes(self, start: int, geometry: Sequence[Tuple[float, float, int]]) -> List[int]:
+        """
+        Replaces estimated sizes with real ones, starting at page `start`.
+        `geometry` holds (width, height, rotation) per page.
+        Returns the indices of pages whose size differed from the estimate.
+        """
+        changed = []
+        for offset, (width, height, rotation) in enumerate(geometry):
+            i = start + offset
+            size = (width, height)
+            if not self.known[i]:
+                self.known[i] = 1
+                self.known_count += 1
+            self.rotations[i] = rotation
+            if self.sizes[i] != size:
+                self.sizes[i] = size
+                changed.append(i)
+        return changed
+
+    def compute(self, scale_for_width: Callable[[float], float]) -> int:
+        """Computes pixel dimensions and y-offsets of all pages. Returns the total height."""
+        sizes = [(h, w) for w, h in self.sizes] if self.rotation % 180 else self.sizes
+        scales = {}
+        for width, _ in sizes:
+            if width not in scales:
+                scales[width] = scale_for_width(width)
+        self.widths = array("q", [int(width * scales[width]) for width, _ in sizes])
+        self.heights = array("q", [int(height * scales[width]) for width, height in sizes])
+        self._steps = array("q", [h + PAGE_SPACING for h in self.heights])
+        self.dims = PageDims(self.widths, self.heights)
+        self.max_width = max(self.widths, default=0)
+        self._update_positions(0)
+        return self.total_height
+
+    def relayout_pages(self, page_indices: Iterable[int], scale_for_width: Callable[[float], float]) -> int:
+        """
+        Recomputes the pixel size of some pages after their page size changed,
+        at an unchanged zoom. Only the offsets from the first changed page
+        onwards are recomputed. Returns the total height.
+        """
+        first = None
+        narrowed_widest = False
+        for i in page_indices:
+            width, height = self.page_size(i)
+            scale = scale_for_width(width)
+            old_width = self.widths[i]
+            self.widths[i] = int(width * scale)
+            self.max_width = max(self.max_width, self.widths[i])
+            narrowed_widest |= old_width == self.max_width and self.widths[i] < old_width
+            self.heights[i] = int(height * scale)
+            self._steps[i] = self.heights[i] + PAGE_SPACING
+            first = i if first is None else min(first, i)
+        if narrowed_widest:
+            self.max_width = max(self.widths, default=0)
+        if first is not None:
+            self._update_positions(first)
+        return self.total_height
+
+    def _update_positions(self, first: int):
+        # Offsets before `first` are unaffected; the prefix sum itself runs in C
+        count = len(self._steps)
+        if first == 0:
+            self.positions = array("q", accumulate(self._steps[:count - 1], initial=PAGE_MARGIN_TOP)) \
+                if count else array("q")
+        else:
+            self.positions[first:] = array("q", accumulate(self._steps[first:count - 1],
+                                                           initial=self.positions[first]))
+        self.total_height = self.positions[-1] + self._steps[-1] if count else PAGE_MARGIN_TOP
+
+    def page_at(self, y: float) -> int:
+        """Returns the index of the page covering canvas position y."""
+        if not self.positions:
+            return 0
+        return max(bisect_right(self.positions, y) - 1, 0)
+
+    def visible_range(self, y0: float, y1: float) -> Optional[Tuple[int, int]]:
+        """Returns the first and last page index intersecting [y0, y1], or None."""
+        if not self.positions:
+            return None
+        first = self.page_at(y0)
+        if self.positions[first] + self.dims[first][1] < y0:
+            first += 1
+        last = self.page_at(y1)
+        if first > last or first >= self.page_count:
+            return None
+        return first, last
+
+
+class PageSizeScanner(threading.Thread):
+    """
+    A worker thread that reads the real size of every page in the background.
+    It opens its own document handle so it never competes with the renderer
+    for the main document. Sizes are delivered in batches on `result_queue`
+    as (start_index, [(width, height, rotation), ...]).
+    """
+    BATCH_SIZE = 256
+
+    def __init__(self, filepath: str, page_count: int, result_queue: queue.Queue, start_page: int = 0):
+        super().__init__(daemon=True)
+        self.filepath = filepath
+        self.page_count = page_count
+        self.result_queue = result_queue
+        self.start_page = start_page
+        self._stop_event = threading.Event()
+        self.start()
+
+    def run(self):
+        try:
+            doc = fitz.open(self.filepath)
+        except Exception as e:
+            print(f"Page size scan failed for {self.filepath}: {e}")
+            return
+
+        try:
+            # Scan from the requested page onwards first, then wrap around
+            order = list(range(self.start_page, self.page_count)) + list(range(0, self.start_page))
+            batch_start, batch = None, []
+            for i in order:
+                if self._stop_event.is_set():
+                    return
+                if batch and i != batch_start + len(batch):
+                    self.result_queue.put((batch_start, batch))
+                    batch_start, batch = None, []
+                page = doc.load_page(i)
+                rect = page.rect
+                if batch_start is None:
+                    batch_start = i
+                batch.append((rect.width, rect.height, page.rotation))
+                if len(batch) >= self.BATCH_SIZE:
+                    self.result_queue.put((batch_start, batch))
+                    batch_start, batch = None, []
+            if batch:
+                self.result_queue.put((batch_start, batch))
+        except Exception as e:
+            print(f"Page size scan error: {e}")
+        finally:
+            doc.close()
+
+    def stop(self):
+        """Stops the scan at the next page."""
+        self._stop_event.set()
@@ -1,11 +1,37 @@
 # main.py
+import multiprocessing
+import sys
 
-from app import PdfApplication
+import metrics
+import single_instance
+from config import SINGLE_INSTANCE
+from opener import DocumentOpener
 
 def main():
     """Main function to run the PDF Viewer application."""
-    app = PdfApplication()
+    # --profile[=trace.json] turns on the instrumentation, the remaining argument is the PDF to open
+    for arg in sys.argv[1:]:
+        if arg == "--profile" or arg.startswith("--profile="):
+            sys.argv.remove(arg)
+            metrics.enable(arg.partition("=")[2] or None)
+    # --single-instance hands the document to an already running viewer
+    use_instance = SINGLE_INSTANCE
+    if "--single-instance" in sys.argv:
+        sys.argv.remove("--single-instance")
+        use_instance = True
+    path = sys.argv[1] if len(sys.argv) > 1 else None
+    if use_instance and single_instance.forward(path):
+        return
+    # Start opening the document before Tk builds the window, so both happen at once
+    opener = DocumentOpener(path)
+    # Imported here, so a launch that only forwards its document never loads Tk
+    from app import PdfApplication
+    app = PdfApplication(opener)
+    if use_instance:
+        app.serve_instance()
     app.mainloop()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # Required for the render processes when running as a frozen executable
+    multiprocessing.freeze_support()
+    main()
@@ -0,0 +1,166 @@
+# metrics.py
+"""
+Timings and counters of the hot paths, for finding out where lag comes from.
+
+Off by default, and then every call is a flag check. It is turned on with
+the PDFVIEWER_PROFILE environment variable or the --profile command line
+flag; both take an optional trace file path ("1" uses TRACE_FILE_NAME).
+While on, every timed section is aggregated per name for the status bar
+overlay and kept as an event for a Chrome trace (chrome://tracing or
+Perfetto), written when the viewer closes.
+"""
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from config import PROFILE_TRACE_EVENTS, PROFILE_WINDOW
+
+ENV_VAR = "PDFVIEWER_PROFILE"
+TRACE_FILE_NAME = "pdfviewer-trace.json"
+
+_enabled = False
+trace_path: Optional[str] = None
+_origin = time.perf_counter()
+_lock = threading.Lock()
+_stats: Dict[str, "_Stat"] = {}
+_counters: Dict[str, int] = {}
+# (name, start, duration, thread id), oldest events are dropped first
+_events = deque(maxlen=PROFILE_TRACE_EVENTS)
+_null_span = contextlib.nullcontext()
+
+
+class _Stat:
+    __slots__ = ("count", "total", "max", "recent")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=PROFILE_WINDOW)
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        _record(self.name, self.start, end - self.start)
+        return False
+
+
+def enable(path: Optional[str] = None):
+    """Turns the measurements on. The trace is written to `path`, or TRACE_FILE_NAME."""
+    global _enabled, trace_path
+    _enabled = True
+    trace_path = path or TRACE_FILE_NAME
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def span(name: str):
+    """Context manager timing the code inside it under `name`."""
+    return _Span(name) if _enabled else _null_span
+
+
+def timed(name: str):
+    """Decorator timing every call of a function under `name`."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _record(name, start, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def add(name: str, seconds: float, end: Optional[float] = None):
+    """Records a duration measured elsewhere (e.g. in a render process), ending at `end` or now."""
+    if _enabled:
+        end = time.perf_counter() if end is None else end
+        _record(name, end - seconds, seconds)
+
+
+def count(name: str, n: int = 1):
+    if _enabled:
+        with _lock:
+            _counters[name] = _counters.get(name, 0) + n
+
+
+def _record(name: str, start: float, seconds: float):
+    with _lock:
+        stat = _stats.get(name)
+        if stat is None:
+            stat = _stats[name] = _Stat()
+        stat.count += 1
+        stat.total += seconds
+        stat.max = max(stat.max, seconds)
+        stat.recent.append(seconds)
+    _events.append((name, start, seconds, threading.get_ident()))
+
+
+def recent_ms(name: str) -> Optional[float]:
+    """Mean duration of the last PROFILE_WINDOW measurements of `name` in ms, or None."""
+    with _lock:
+        stat = _stats.get(name)
+        if stat is None or not stat.recent:
+            return None
+        return sum(stat.recent) / len(stat.recent) * 1000
+
+
+def counter(name: str) -> int:
+    return _counters.get(name, 0)
+
+
+def summary() -> dict:
+    """Totals per timed name (count, mean and max in ms) and the counters."""
+    with _lock:
+        timings = {name: {"count": s.count, "mean_ms": s.total / s.count * 1000, "max_ms": s.max * 1000}
+                   for name, s in _stats.items()}
+        return {"timings": timings, "counters": dict(_counters)}
+
+
+def dump_trace(path: Optional[str] = None) -> Optional[str]:
+    """Writes the recorded events as Chrome trace JSON. Returns the path, or None if off or failed."""
+    path = path or trace_path
+    if not _enabled or not path:
+        return None
+    pid = os.getpid()
+    events = [{"name": name, "cat": name.split(".")[0], "ph": "X", "pid": pid, "tid": tid,
+               "ts": (start - _origin) * 1e6, "dur": seconds * 1e6}
+              for name, start, seconds, tid in list(_events)]
+    trace = {"traceEvents": events, "displayTimeUnit": "ms", "otherData": summary()}
+    try:
+        with open(path, "w") as f:
+            json.dump(trace, f)
+    except OSError as e:
+        print(f"Could not write trace: {e}")
+        return None
+    return path
+
+
+def _enable_from_environment():
+    value = os.environ.get(ENV_VAR, "")
+    if value and value != "0":
+        enable(None if value == "1" else value)
+
+
+_enable_from_environment()
@@ -0,0 +1,53 @@
+# notifier.py
+import queue
+import threading
+import tkinter as tk
+
+
+class TkNotifier:
+    """
+    Wakes the Tk event loop from worker threads by posting a virtual event.
+
+    Wakeups are coalesced: after one event has been posted, further calls do
+    nothing until the handler calls acknowledge(), so a burst of results costs
+    a single event. The handler must acknowledge before draining its queues,
+    then anything queued later posts a new event.
+
+    Posting events from other threads needs a thread-enabled Tcl; without one
+    `threaded` is False and the application has to poll instead.
+    """
+    def __init__(self, widget: tk.Misc, sequence: str):
+        self.widget = widget
+        self.sequence = sequence
+        self.threaded = bool(widget.tk.call("info", "exists", "tcl_platform(threaded)"))
+        self._lock = threading.Lock()
+        self._pending = False
+
+    def notify(self):
+        """Posts the event unless one is already waiting. Safe to call from any thread."""
+        with self._lock:
+            if self._pending or not self.threaded:
+                return
+            self._pending = True
+        try:
+            self.widget.event_generate(self.sequence, when="tail")
+        except (tk.TclError, RuntimeError):
+            # The window is gone, or the main loop is not running yet
+            with self._lock:
+                self._pending = False
+
+    def acknowledge(self):
+        """Called on the Tk thread when the event is handled, before draining."""
+        with self._lock:
+            self._pending = False
+
+
+class NotifyingQueue(queue.Queue):
+    """A queue that wakes the Tk event loop whenever an item is put on it."""
+    def __init__(self, notifier: TkNotifier):
+        super().__init__()
+        self.notifier = notifier
+
+    def put(self, item, block=True, timeout=None):
+        super().put(item, block, timeout)
+        self.notifier.notify()
@@ -0,0 +1,37 @@
+# opener.py
+import importlib
+import threading
+from typing import Optional
+
+# Modules the controller imports where it first needs them
+PRELOAD_MODULES = ("pdf_model", "layout", "renderer", "render_pool", "searcher", "text_index", "thumbnails")
+
+
+class DocumentOpener(threading.Thread):
+    """
+    Loads PyMuPDF and the modules built on it, and opens the document given
+    on the command line, while the main thread creates the window. The window
+    therefore appears without waiting for the imports or the file; the
+    controller picks up `pdf_model` (or `error`) once the thread is done.
+    Without a path it only loads the modules, so a file opened later from the
+    dialog does not pay for them either.
+    """
+    def __init__(self, path: Optional[str] = None):
+        super().__init__(daemon=True)
+        self.path = path
+        self.pdf_model = None
+        self.error: Optional[Exception] = None
+        self.start()
+
+    def run(self):
+        try:
+            # These load fitz, the slowest part of starting up
+            for module in PRELOAD_MODULES:
+                importlib.import_module(module)
+            from pdf_model import PDFModel
+            if self.path:
+                self.pdf_model = PDFModel(self.path)
+                # Maps the stored page geometry, if any, so the first layout is exact
+                self.pdf_model.load_geometry()
+        except Exception as e:
+            self.error = e
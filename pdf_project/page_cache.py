@@ -0,0 +1,161 @@
+# page_cache.py
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, NamedTuple, Optional
+
+
+class CachedImage(NamedTuple):
+    image: Any                  # ImageTk.PhotoImage
+    scale: float                # Zoom the pixels are valid for
+    sharp: bool                 # False for previews and rescaled copies
+    item: Optional[int] = None  # Canvas item of a tile; full pages use the page's item
+
+
+class MemoryBudget:
+    """
+    One memory budget shared by the page caches of all open documents.
+
+    A cache that grows past the shared budget first reclaims memory from the
+    other caches (the documents in background tabs), least recently used
+    entries first, and only then evicts its own entries.
+    """
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self.caches: List["PageCache"] = []
+
+    @property
+    def bytes_used(self) -> int:
+        return sum(cache.bytes_used for cache in self.caches)
+
+    def over_budget(self) -> bool:
+        return self.bytes_used > self.budget_bytes
+
+    def reclaim(self, requester: "PageCache"):
+        for cache in self.caches:
+            if cache is requester:
+                continue
+            while self.over_budget() and cache.evict_one():
+                pass
+
+
+class PageCache:
+    """
+    LRU cache of rendered page images, bounded by an approximate memory budget.
+
+    Every entry carries its size in bytes. Touching and evicting are O(1): the
+    entries live in an OrderedDict ordered from least to most recently used.
+    Pinned entries (the pages on screen) are never evicted; when the budget is
+    exceeded they are skipped and the next least recently used entry goes.
+    With a shared MemoryBudget the budget covers all registered caches together.
+    """
+    def __init__(self, budget_bytes: int, on_evict: Optional[Callable[[Hashable, Any], None]] = None,
+                 shared: Optional[MemoryBudget] = None):
+        self.budget_bytes = budget_bytes
+        self.on_evict = on_evict
+        self.shared = shared
+        if shared is not None:
+            shared.caches.append(self)
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._pinned = set()
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def keys(self):
+        return self._entries.keys()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Returns a cached value and marks it most recently used. Counts a hit or a miss."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Returns a cached value without touching it or counting it in the stats."""
+        entry = self._entries.get(key)
+        return entry[0] if entry is not None else None
+
+    def put(self, key: Hashable, value: Any, nbytes: int):
+        """Adds or replaces an entry, then evicts entries until the cache fits its budget."""
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.bytes_used -= old[1]
+        self._entries[key] = (value, nbytes)
+        self.bytes_used += nbytes
+        self._evict()
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        """Removes an entry without counting it as an eviction. Returns its value."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        self.bytes_used -= entry[1]
+        return entry[0]
+
+    def pin(self, keys: Iterable[Hashable]):
+        """Replaces the set of entries that must not be evicted."""
+        self._pinned = set(keys)
+        self._evict()
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes_used = 0
+
+    def detach(self):
+        """Removes the cache from its shared budget, when its document is closed."""
+        if self.shared is not None and self in self.shared.caches:
+            self.shared.caches.remove(self)
+        self.clear()
+
+    def evict_one(self) -> bool:
+        """Evicts the least recently used unpinned entry. Returns False if there is none."""
+        for key in self._entries:
+            if key not in self._pinned:
+                self._remove(key)
+                return True
+        return False
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes_used,
+            "budget": self.shared.budget_bytes if self.shared is not None else self.budget_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _over_budget(self) -> bool:
+        if self.shared is not None:
+            return self.shared.over_budget()
+        return self.bytes_used > self.budget_bytes
+
+    def _evict(self):
+        if self.shared is not None and self.shared.over_budget():
+            self.shared.reclaim(self)
+        # Each pinned entry is skipped at most once, so this stays linear in the evictions
+        skipped = 0
+        while self._over_budget() and skipped < len(self._entries):
+            key = next(iter(self._entries))
+            if key in self._pinned:
+                self._entries.move_to_end(key)
+                skipped += 1
+                continue
+            self._remove(key)
+
+    def _remove(self, key: Hashable):
+        value, nbytes = self._entries.pop(key)
+        self.bytes_used -= nbytes
+        self.evictions += 1
+        if self.on_evict:
+            self.on_evict(key, value)
@@ -1,7 +1,16 @@
 # pdf_model.py
+import os
 import fitz  # PyMuPDF
 from typing import List, Tuple, Optional
 
+from storage import cache_dir, file_fingerprint
+from geometry_index import GeometryIndex
+from text_index import TextIndex
+from thumbnails import ThumbnailStore
+
+# Used as the page size estimate when the first page cannot be read (A4 in points)
+DEFAULT_PAGE_SIZE: Tuple[float, float] = (595.0, 842.0)
+
 class PDFModel:
     """
     The Model class responsible for handling the PDF document.
@@ -11,7 +20,14 @@ class PDFModel:
         self.filepath = filepath
         self.doc: Optional[fitz.Document] = fitz.open(filepath)
         self.page_count = self.doc.page_count if self.doc else 0
-        self.page_text_cache = {}
+
+        st = os.stat(filepath)
+        self.file_size, self.mtime_ns = st.st_size, st.st_mtime_ns
+        self.fingerprint = file_fingerprint(filepath)
+        self.geometry: Optional[GeometryIndex] = None
+        self.text_index: Optional[TextIndex] = None
+        # Set once the text index directory turned out to be unusable, so it is reported only once
+        self._text_index_unavailable = False
 
     def get_page(self, page_num: int):
         """Returns a page object from the document."""
@@ -24,21 +40,95 @@ class PDFModel:
         page = self.get_page(page_num)
         return page.rect if page else None
 
+    def estimate_page_size(self) -> Tuple[float, float]:
+        """
+        Returns a size estimate for pages whose real size has not been read yet.
+        Only the first page is sampled, so this is cheap for any page count.
+        """
+        rect = self.get_page_size(0)
+        if rect is None or rect.is_empty:
+            return DEFAULT_PAGE_SIZE
+        return rect.width, rect.height
+
+    def _geometry_path(self) -> str:
+        return os.path.join(cache_dir("geometry"), f"{self.fingerprint}.geo")
+
+    def load_geometry(self) -> Optional[GeometryIndex]:
+        """
+        Returns the stored page geometry of this document, or None if it has not
+        been indexed yet. Stale or corrupt index files are discarded.
+        """
+        if self.geometry is None:
+            try:
+                self.geometry = GeometryIndex.load(self._geometry_path(), self.page_count,
+                                                   self.file_size, self.mtime_ns)
+            except OSError as e:
+                print(f"Could not read page geometry index: {e}")
+        return self.geometry
+
+    def save_geometry(self, sizes: List[Tuple[float, float]], rotations: List[int]):
+        """Stores the page geometry of this document for the next time it is opened."""
+        try:
+            GeometryIndex.save(self._geometry_path(), [w for w, _ in sizes], [h for _, h in sizes],
+                               rotations, self.file_size, self.mtime_ns)
+        except OSError as e:
+            print(f"Could not write page geometry index: {e}")
+
+    def text_index_path(self) -> Optional[str]:
+        """Where the text index is stored, or None without a usable cache directory."""
+        if self._text_index_unavailable:
+            return None
+        try:
+            return os.path.join(cache_dir("text"), f"{self.fingerprint}.sqlite")
+        except OSError as e:
+            print(f"Could not open text index cache: {e}")
+            self._text_index_unavailable = True
+            return None
+
+    def load_text_index(self) -> Optional[TextIndex]:
+        """
+        Returns the persistent text index of this document, or None until one
+        has been built (see TextIndexBuilder).
+        """
+        if self.text_index is None:
+            path = self.text_index_path()
+            if path is not None:
+                self.text_index = TextIndex.load(path, self.page_count)
+        return self.text_index
+
+    def load_thumbnails(self) -> ThumbnailStore:
+        """
+        Reads the thumbnails of this document stored by earlier sessions (possibly
+        none). Without a usable cache directory they are only kept in memory.
+        """
+        try:
+            path = os.path.join(cache_dir("thumbnails"), f"{self.fingerprint}.thumbs")
+        except OSError as e:
+            print(f"Could not open thumbnail cache: {e}")
+            return ThumbnailStore(None, self.page_count)
+        return ThumbnailStore.load(path, self.page_count)
+
     def search(self, text: str) -> List[Tuple[int, fitz.Rect]]:
-        """Searches for text within the entire document."""
+        """Searches for text within the entire document, using the text index when there is one."""
         results = []
         if not self.doc:
             return results
+        if self.load_text_index():
+            return self.text_index.search(text)
 
         for i in range(self.page_count):
-            if i not in self.page_text_cache:
-                self.page_text_cache[i] = self.get_page(i).get_text()
             for hit in self.get_page(i).search_for(text):
                 results.append((i, hit))
         return results
 
     def close(self):
         """Closes the PDF document."""
+        if self.geometry:
+            self.geometry.close()
+            self.geometry = None
+        if self.text_index:
+            self.text_index.close()
+            self.text_index = None
         if self.doc:
             self.doc.close()
             self.doc = None
\ No newline at end of file
@@ -0,0 +1,77 @@
+# prefetch.py
+import math
+import time
+from collections import deque
+from typing import Optional, Tuple
+
+from config import (FLING_VIEWPORTS_PER_SECOND, PREFETCH_LOG_INTERVAL, PREFETCH_LOOKAHEAD_SECONDS,
+                    PREFETCH_MAX_PAGES, SCROLL_SETTLE_MS)
+
+# Scroll positions older than this do not count towards the velocity (seconds)
+VELOCITY_WINDOW = 0.2
+
+
+class ScrollTracker:
+    """
+    Estimates scroll velocity from the positions the user scrolls through,
+    and turns it into a prefetch window: more pages ahead in the direction of
+    travel the faster the user scrolls, fewer behind.
+
+    It also keeps the prefetch hit rate, the share of pages that already had a
+    sharp image when they came into view, and prints it every
+    PREFETCH_LOG_INTERVAL pages.
+    """
+    def __init__(self):
+        self._samples = deque()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, y: float, now: Optional[float] = None):
+        """Records the viewport's top position after a user scroll (wheel or scrollbar)."""
+        now = time.perf_counter() if now is None else now
+        self._samples.append((now, y))
+        self._trim(now)
+
+    def reset(self):
+        """Forgets the motion, e.g. after a jump to a page, which is not a scroll."""
+        self._samples.clear()
+
+    def velocity(self, now: Optional[float] = None) -> float:
+        """Scroll velocity in pixels per second, positive when scrolling down. 0 once settled."""
+        now = time.perf_counter() if now is None else now
+        self._trim(now)
+        if len(self._samples) < 2 or now - self._samples[-1][0] > SCROLL_SETTLE_MS / 1000:
+            return 0.0
+        (t0, y0), (t1, y1) = self._samples[0], self._samples[-1]
+        return (y1 - y0) / (t1 - t0) if t1 > t0 else 0.0
+
+    def is_fling(self, viewport_height: float, now: Optional[float] = None) -> bool:
+        """True while the user scrolls so fast that the pages on screen are only passed through."""
+        return abs(self.velocity(now)) > FLING_VIEWPORTS_PER_SECOND * viewport_height
+
+    def prefetch_extent(self, base: int, page_height: float, now: Optional[float] = None) -> Tuple[int, int]:
+        """
+        Returns how many pages to prefetch (ahead, behind) of the visible ones.
+        At rest both are `base`; while scrolling, ahead covers the distance the
+        current speed reaches within PREFETCH_LOOKAHEAD_SECONDS and behind
+        shrinks to one page.
+        """
+        speed = abs(self.velocity(now))
+        if speed == 0 or page_height <= 0:
+            return base, base
+        ahead = base + math.ceil(speed * PREFETCH_LOOKAHEAD_SECONDS / page_height)
+        return min(ahead, PREFETCH_MAX_PAGES), min(base, 1)
+
+    def count_arrival(self, hit: bool):
+        """Counts a page coming into view, with or without a sharp image ready."""
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        total = self.hits + self.misses
+        if total % PREFETCH_LOG_INTERVAL == 0:
+            print(f"Prefetch hit rate: {self.hits / total:.0%} ({self.hits}/{total} pages ready when shown)")
+
+    def _trim(self, now: float):
+        while self._samples and now - self._samples[0][0] > VELOCITY_WINDOW:
+            self._samples.popleft()
@@ -0,0 +1,221 @@
+# render_pool.py
+import multiprocessing
+import os
+import sys
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from typing import Iterable, Optional, Tuple
+
+import fitz  # PyMuPDF
+
+from config import DISPLAY_LIST_MEMORY_BUDGET, PREVIEW_ZOOM_FACTOR
+from page_cache import PageCache
+from storage import atomic_write
+from tiles import Tile
+
+# A document in the worker processes: (filepath, version of the file's contents)
+DocumentKey = Tuple[str, str]
+
+# Documents kept open in each worker process, most recently used last (enough for the open tabs)
+_MAX_OPEN_DOCS = 8
+_open_docs: "OrderedDict[DocumentKey, fitz.Document]" = OrderedDict()
+# Parsed pages of the open documents in this process, keyed by (document key, page_index)
+_display_lists = PageCache(DISPLAY_LIST_MEMORY_BUDGET)
+# Counted per display list on top of the content stream size (bytes)
+DISPLAY_LIST_OVERHEAD = 1024
+
+
+def document_key(filepath: str, version: Optional[str] = None) -> DocumentKey:
+    """
+    Identifies a document in the worker processes. `version` is the file's
+    fingerprint; by default its size and modification time. A file rewritten
+    on disk gets a new key, so no process renders it from an old handle.
+    """
+    if version is None:
+        st = os.stat(filepath)
+        version = f"{st.st_size}:{st.st_mtime_ns}"
+    return filepath, version
+
+
+def _close_document(key: DocumentKey):
+    doc = _open_docs.pop(key, None)
+    if doc is not None:
+        for display_key in [k for k in _display_lists.keys() if k[0] == key]:
+            _display_lists.pop(display_key)
+        doc.close()
+
+
+def _get_document(key: DocumentKey, closed: Iterable[DocumentKey] = ()) -> fitz.Document:
+    """
+    Returns this process's own handle to a document, opening it if needed.
+    Documents in `closed` (closed in the viewer since) are dropped first.
+    """
+    for old_key in closed:
+        _close_document(old_key)
+    doc = _open_docs.get(key)
+    if doc is None:
+        doc = fitz.open(key[0])
+        _open_docs[key] = doc
+        while len(_open_docs) > _MAX_OPEN_DOCS:
+            _close_document(next(iter(_open_docs)))
+    else:
+        _open_docs.move_to_end(key)
+    return doc
+
+
+def load_display_list(doc: fitz.Document, page_index: int, cache: PageCache, key) -> fitz.DisplayList:
+    """
+    Returns a page's content parsed into a display list, from `cache` or by
+    parsing the page. A display list rasterizes at any matrix and clip without
+    interpreting the content stream again, so zoom steps, rotations and the
+    tiles of a page only pay for the parsing once.
+    """
+    display_list = cache.get(key)
+    if display_list is None:
+        page = doc.load_page(page_index)
+        display_list = page.get_displaylist()
+        # The content stream size stands in for the size of the parsed list
+        cache.put(key, display_list, len(page.read_contents()) + DISPLAY_LIST_OVERHEAD)
+    return display_list
+
+
+def render_pixmap(page, zoom: float, rotation: int, tile: Optional[Tile] = None,
+                  preview: bool = False) -> fitz.Pixmap:
+    """
+    Renders a page, or only one tile of it. `page` is a fitz.Page or the
+    page's fitz.DisplayList. A tile is a pixel rectangle of the
+    full page rendering at this zoom and rotation.
+    A preview is rasterized at PREVIEW_ZOOM_FACTOR of the zoom and scaled up to
+    the full size, which is much cheaper on heavy pages.
+    """
+    mat = fitz.Matrix(zoom, zoom).prerotate(rotation)
+    if preview:
+        full = (page.rect * mat).irect
+        small = render_pixmap(page, zoom * PREVIEW_ZOOM_FACTOR, rotation)
+        return fitz.Pixmap(small, full.width, full.height, None)
+    if tile is None:
+        return page.get_pixmap(matrix=mat, alpha=False)
+
+    # Map the tile back from rendered pixels to page coordinates
+    origin = (page.rect * mat).irect
+    clip = fitz.Rect(tile) + (origin.x0, origin.y0, origin.x0, origin.y0)
+    return page.get_pixmap(matrix=mat, clip=clip * ~mat, alpha=False)
+
+
+def ppm_header(width: int, height: int) -> bytes:
+    """Header of a binary (P6) PPM image, which Tk's PhotoImage reads directly."""
+    return b"P6\n%d %d\n255\n" % (width, height)
+
+
+def render_page(key: DocumentKey, page_index: int, zoom: float, rotation: int,
+                tile: Optional[Tile] = None, preview: bool = False,
+                closed: Tuple[DocumentKey, ...] = ()) -> Tuple[str, int, int, int, float]:
+    """
+    Renders a page (or a tile of it) inside a worker process as PPM data. The
+    pixels are copied straight from the pixmap's buffer into a new shared memory
+    block, so only its name, the data size, the image size and the rendering
+    time travel back through the pool's pipe. The caller owns the block and
+    must unlink it.
+    """
+    start = time.perf_counter()
+    page = load_display_list(_get_document(key, closed), page_index, _display_lists, (key, page_index))
+    pix = render_pixmap(page, zoom, rotation, tile, preview)
+    seconds = time.perf_counter() - start
+    header = ppm_header(pix.width, pix.height)
+    samples = pix.samples_mv
+    size = len(header) + len(samples)
+    shm = _create_shared_memory(size)
+    try:
+        shm.buf[:len(header)] = header
+        shm.buf[len(header):size] = samples
+        return shm.name, size, pix.width, pix.height, seconds
+    finally:
+        shm.close()
+
+
+def _create_shared_memory(size: int) -> shared_memory.SharedMemory:
+    """
+    A new block that this process does not track: the UI process unlinks it,
+    and a tracked block would be reported as leaked (and unlinked a second
+    time) when the pool shuts down.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(create=True, size=size, track=False)
+    shm = shared_memory.SharedMemory(create=True, size=size)
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+def export_page(key: DocumentKey, page_index: int, zoom: float, rotation: int, out_path: str,
+                image_format: str = "png", jpeg_quality: int = 90) -> int:
+    """
+    Renders a page and writes it to `out_path` as PNG or JPEG, encoding it in
+    the worker process so only the byte count travels back. The file is
+    written atomically, so an existing output file is always complete.
+    """
+    page = _get_document(key).load_page(page_index)
+    pix = render_pixmap(page, zoom, rotation)
+    if image_format == "jpeg":
+        data = pix.tobytes("jpeg", jpg_quality=jpeg_quality)
+    else:
+        data = pix.tobytes("png")
+    atomic_write(out_path, data)
+    return len(data)
+
+
+def take_data(shm_name: str, size: int) -> bytes:
+    """Copies rendered PPM data out of its shared memory block and frees the block."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        return bytes(shm.buf[:size])
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+class RenderPool:
+    """
+    A pool of worker processes rendering pages in parallel.
+    Each process opens its own handle to the documents it renders, so
+    rendering is not serialized on the GIL of the UI process.
+    The processes are spawned, not forked: the pool is started while Tk and
+    other threads are running MuPDF, and a forked child would inherit their
+    locks in whatever state they were.
+    """
+    def __init__(self, processes: int):
+        self.processes = processes
+        self._executor = ProcessPoolExecutor(max_workers=processes,
+                                             mp_context=multiprocessing.get_context("spawn"))
+        # The last documents closed in the viewer, sent along with every job (closing them again is free)
+        self._closed = deque(maxlen=_MAX_OPEN_DOCS)
+
+    def submit(self, key: DocumentKey, page_index: int, zoom: float, rotation: int,
+               tile: Optional[Tile] = None, preview: bool = False) -> Future:
+        if key in self._closed:
+            # Opened again in the viewer
+            self._closed.remove(key)
+        return self._executor.submit(render_page, key, page_index, zoom, rotation, tile, preview,
+                                     tuple(self._closed))
+
+    def submit_export(self, key: DocumentKey, page_index: int, zoom: float, rotation: int, out_path: str,
+                      image_format: str = "png", jpeg_quality: int = 90) -> Future:
+        return self._executor.submit(export_page, key, page_index, zoom, rotation, out_path,
+                                     image_format, jpeg_quality)
+
+    def forget(self, key: DocumentKey):
+        """Lets the processes close their handles and display lists of a document closed in the viewer."""
+        if key not in self._closed:
+            self._closed.append(key)
+
+    def shutdown(self, wait: bool = True):
+        """Cancels the queued jobs and stops the processes; with `wait`, after the running jobs."""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+def default_process_count(configured: int) -> int:
+    """Resolves the configured pool size, where 0 means one process per CPU core."""
+    if configured > 0:
+        return configured
+    return max(os.cpu_count() or 1, 1)
@@ -1,39 +1,169 @@
 # renderer.py
 import threading
-import queue
-import fitz  # PyMuPDF
-from PIL import Image
+import time
+from typing import Optional
+
+from config import DISPLAY_LIST_MEMORY_BUDGET, RENDER_PROCESSES
+import metrics
+from page_cache import PageCache
+from render_pool import (RenderPool, default_process_count, document_key, load_display_list, render_pixmap,
+                         take_data)
+from disk_cache import ppm_size
+from scheduler import RenderScheduler, RenderJob, RenderResult, PRIORITY_VISIBLE
 
 class RenderWorker(threading.Thread):
     """
     A worker thread that renders PDF pages in the background.
+    With more than one render process configured, it hands the pages to a
+    RenderPool and only collects the finished images; otherwise it renders
+    them itself using the shared document.
+
+    Requests go through a RenderScheduler, so the most urgent page is always
+    rendered next and jobs from an outdated generation are never rendered.
+    Results are put on `result_queue` as RenderResult tuples holding PPM data,
+    so the Tk thread only has to hand the bytes to a PhotoImage.
+
+    With a DiskPageCache, pages stored by an earlier session are read from
+    disk instead of being rendered, and new sharp renders are stored.
+    Pages are parsed into display lists once and kept in an LRU, so a page
+    rendered again at another zoom or as tiles is only rasterized.
+
+    Workers of several documents can share one RenderPool; a shared pool is
+    left running when the worker stops, and its processes drop the document.
+    The processes know the document by its path and `fingerprint`, so a file
+    rewritten on disk is never rendered from an old handle.
     """
-    def __init__(self, pdf_doc, result_queue):
+    def __init__(self, pdf_doc, result_queue, processes: int = RENDER_PROCESSES, disk_cache=None,
+                 pool: Optional[RenderPool] = None, fingerprint: Optional[str] = None):
         super().__init__(daemon=True)
         self.pdf_doc = pdf_doc
+        self.doc_key = document_key(pdf_doc.name, fingerprint)
         self.result_queue = result_queue
-        self.render_queue = queue.Queue()
+        self.disk_cache = disk_cache
+        self.scheduler = RenderScheduler()
+        # Parsed pages for rendering in this thread; the pool's processes keep their own
+        self.display_lists = PageCache(DISPLAY_LIST_MEMORY_BUDGET)
+        self._owns_pool = pool is None
+        if pool is not None:
+            self.processes = pool.processes
+            self.pool = pool
+        else:
+            self.processes = default_process_count(processes)
+            self.pool = RenderPool(self.processes) if self.processes > 1 else None
+        # Bounds the jobs handed to the pool, so pending work stays in the scheduler where it can be dropped
+        self._in_flight = threading.BoundedSemaphore(self.processes * 2)
+        self._stopped = False
         self.start()
 
     def run(self):
         while True:
-            page_index, zoom, rotation = self.render_queue.get()
-            if page_index is None:  # Sentinel value to stop the thread
+            # Wait for a free pool slot before picking the job, so the choice is made as late as possible
+            pool = self.pool
+            if pool:
+                self._in_flight.acquire()
+            job = self.scheduler.get()
+            if job is None:  # The scheduler was closed
                 break
+            metrics.add("render.queue_wait", time.perf_counter() - job.queued_at)
+
+            if self._load_from_disk(job):
+                if pool:
+                    self._in_flight.release()
+            elif pool:
+                self._submit_to_pool(job)
+            else:
+                self._render_here(job)
+
+        if self.pool and self._owns_pool:
+            self.pool.shutdown()
+        elif self.pool:
+            self.pool.forget(self.doc_key)
+
+    def _load_from_disk(self, job: RenderJob) -> bool:
+        """Delivers a page stored by the disk cache. Returns False if it has to be rendered."""
+        if self.disk_cache is None or job.preview:
+            return False
+        with metrics.span("render.disk_read"):
+            data = self.disk_cache.get(job.page_index, job.zoom, job.rotation, job.tile)
+        if data is None:
+            metrics.count("cache.disk_miss")
+            return False
+        metrics.count("cache.disk_hit")
+        width, height, _ = ppm_size(data)
+        if self.scheduler.is_current(job):
+            self.result_queue.put(RenderResult(job, data, width, height))
+        return True
+
+    def _store_on_disk(self, job: RenderJob, data: bytes):
+        if self.disk_cache is not None and not job.preview:
+            self.disk_cache.put(job.page_index, job.zoom, job.rotation, job.tile, data)
+
+    def _render_here(self, job: RenderJob):
+        if not self.scheduler.is_current(job):
+            return
+        try:
+            with metrics.span("render.pixmap"):
+                page = load_display_list(self.pdf_doc, job.page_index, self.display_lists, job.page_index)
+                pix = render_pixmap(page, job.zoom, job.rotation, job.tile, job.preview)
+            # A single copy, made by MuPDF from the pixmap's buffer
+            with metrics.span("render.ppm"):
+                data = pix.tobytes("ppm")
+            self.result_queue.put(RenderResult(job, data, pix.width, pix.height))
+            self._store_on_disk(job, data)
+        except Exception as e:
+            print(f"Rendering error on page {job.page_index}: {e}")
+
+    def _submit_to_pool(self, job: RenderJob):
+        try:
+            future = self.pool.submit(self.doc_key, job.page_index, job.zoom, job.rotation,
+                                      job.tile, job.preview)
+        except Exception as e:
+            # The pool is unusable (e.g. a worker process died), keep rendering in this thread
+            print(f"Render pool unavailable, rendering in-process: {e}")
+            self._in_flight.release()
+            self.pool = None
+            self._render_here(job)
+            return
+        future.add_done_callback(lambda f: self._on_pool_result(f, job))
+
+    def _on_pool_result(self, future, job: RenderJob):
+        self._in_flight.release()
+        if future.cancelled():
+            return
+        try:
+            shm_name, size, width, height, seconds = future.result()
+            # Timed in the render process; recorded as ending now
+            metrics.add("render.pixmap", seconds)
+            # Always take the data so the shared memory block is freed
+            with metrics.span("render.ppm"):
+                data = take_data(shm_name, size)
+            if not self._stopped and self.scheduler.is_current(job):
+                self.result_queue.put(RenderResult(job, data, width, height))
+            self._store_on_disk(job, data)
+        except Exception as e:
+            print(f"Rendering error on page {job.page_index}: {e}")
+
+    def busy(self) -> bool:
+        """True while render requests are waiting."""
+        return self.scheduler.pending_count() > 0
+
+    @property
+    def generation(self) -> int:
+        return self.scheduler.generation
+
+    def render(self, page_index, zoom, rotation, priority=PRIORITY_VISIBLE, tile=None, preview=False):
+        """Schedules a page (or page tile) rendering request."""
+        self.scheduler.submit(page_index, zoom, rotation, priority, tile, preview)
 
-            try:
-                page = self.pdf_doc.load_page(page_index)
-                mat = fitz.Matrix(zoom, zoom).prerotate(rotation)
-                pix = page.get_pixmap(matrix=mat, alpha=False)
-                img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
-                self.result_queue.put((page_index, zoom, rotation, img))
-            except Exception as e:
-                print(f"Rendering error on page {page_index}: {e}")
+    def retain(self, keys):
+        """Cancels pending requests whose (page_index, tile) key is no longer needed."""
+        self.scheduler.retain(keys)
 
-    def render(self, page_index, zoom, rotation):
-        """Adds a page rendering request to the queue."""
-        self.render_queue.put((page_index, zoom, rotation))
+    def new_generation(self) -> int:
+        """Cancels all pending requests, e.g. after a zoom or rotation change."""
+        return self.scheduler.next_generation()
 
     def stop(self):
         """Stops the worker thread."""
-        self.render_queue.put((None, None, None))
\ No newline at end of file
+        self._stopped = True
+        self.scheduler.close()
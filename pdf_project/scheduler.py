@@ -0,0 +1,119 @@
+# scheduler.py
+import heapq
+import itertools
+import threading
+import time
+from typing import Dict, Hashable, Iterable, List, NamedTuple, Optional, Tuple
+
+from tiles import Tile
+
+# Render priorities, lower values are rendered first
+PRIORITY_PREVIEW = 0   # Low resolution previews of visible pages
+PRIORITY_VISIBLE = 1   # Pages intersecting the viewport
+PRIORITY_AHEAD = 2     # Buffer pages in the direction the user is scrolling
+PRIORITY_BUFFER = 3    # Remaining buffer pages
+
+
+class RenderJob(NamedTuple):
+    page_index: int
+    zoom: float
+    rotation: int
+    generation: int
+    tile: Optional[Tile] = None
+    preview: bool = False
+    queued_at: float = 0.0  # time.perf_counter() when the page was first requested
+
+
+class RenderResult(NamedTuple):
+    job: RenderJob
+    data: bytes    # Binary PPM image, ready for tk.PhotoImage(data=...)
+    width: int
+    height: int
+
+
+class RenderScheduler:
+    """
+    Thread-safe priority queue of render jobs.
+
+    There is at most one pending job per page (or per tile of a tiled page, and
+    one more for its preview): a new request for a page that is already waiting
+    replaces its parameters and keeps the more urgent priority.
+    Every job belongs to a generation; starting a new generation (after a zoom
+    or rotation change) drops all pending jobs before they are rendered.
+    """
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._heap: List[Tuple[int, int, Hashable]] = []
+        self._pending: Dict[Hashable, Tuple[int, int, float, int, float]] = {}
+        self._seq = itertools.count()
+        self._closed = False
+        self.generation = 0
+
+    def submit(self, page_index: int, zoom: float, rotation: int, priority: int = PRIORITY_VISIBLE,
+               tile: Optional[Tile] = None, preview: bool = False):
+        """Queues a page or tile, merging it with a pending request for the same one."""
+        key = (page_index, tile, preview)
+        queued_at = time.perf_counter()
+        with self._cond:
+            existing = self._pending.get(key)
+            if existing is not None:
+                if existing[0] <= priority and existing[2] == zoom and existing[3] == rotation:
+                    return
+                priority = min(priority, existing[0])
+                queued_at = existing[4]
+            seq = next(self._seq)
+            self._pending[key] = (priority, seq, zoom, rotation, queued_at)
+            heapq.heappush(self._heap, (priority, seq, key))
+            self._cond.notify()
+
+    def retain(self, keys: Iterable[Tuple[int, Optional[Tile]]]):
+        """Drops pending jobs whose (page_index, tile) key is not in `keys`."""
+        keep = set(keys)
+        with self._cond:
+            dropped = [k for k in self._pending if k[:2] not in keep]
+            for key in dropped:
+                del self._pending[key]
+            if dropped:
+                # Rebuilt from the surviving jobs, so get() never wades through dropped or replaced entries
+                self._heap = [(entry[0], entry[1], key) for key, entry in self._pending.items()]
+                heapq.heapify(self._heap)
+
+    def next_generation(self) -> int:
+        """Starts a new generation, discarding all pending jobs. Returns the new generation."""
+        with self._cond:
+            self.generation += 1
+            self._pending.clear()
+            self._heap.clear()
+            return self.generation
+
+    def get(self) -> Optional[RenderJob]:
+        """Blocks until the most urgent job is available. Returns None once closed."""
+        with self._cond:
+            while True:
+                if self._closed:
+                    return None
+                while self._heap:
+                    priority, seq, key = heapq.heappop(self._heap)
+                    entry = self._pending.get(key)
+                    # Entries replaced by a later submit or dropped by retain are skipped
+                    if entry is None or entry[1] != seq:
+                        continue
+                    del self._pending[key]
+                    page_index, tile, preview = key
+                    return RenderJob(page_index, entry[2], entry[3], self.generation, tile, preview, entry[4])
+                self._cond.wait()
+
+    def pending_count(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def is_current(self, job: RenderJob) -> bool:
+        return job.generation == self.generation
+
+    def close(self):
+        """Wakes up and stops every thread waiting in get()."""
+        with self._cond:
+            self._closed = True
+            self._pending.clear()
+            self._heap.clear()
+            self._cond.notify_all()
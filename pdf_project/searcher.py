@@ -0,0 +1,90 @@
+# searcher.py
+import threading
+import queue
+import time
+from typing import Optional
+
+import fitz  # PyMuPDF
+
+import metrics
+from text_index import TextIndex
+
+# Minimum time between progress messages (seconds)
+PROGRESS_INTERVAL = 0.1
+
+
+class SearchWorker(threading.Thread):
+    """
+    A worker thread that searches the document page by page in the background.
+    It uses its own document handle and streams its findings on `result_queue`:
+    ("hits", [(page_index, rect), ...]) whenever a page has hits,
+    ("progress", pages_searched) at most every PROGRESS_INTERVAL, and
+    ("done", pages_searched) when it finishes.
+
+    With the path of a complete TextIndex it queries the index instead, off
+    the Tk thread, since a short or common term matches many postings.
+    """
+    def __init__(self, filepath: str, text: str, page_count: int, result_queue: queue.Queue,
+                 index_path: Optional[str] = None):
+        super().__init__(daemon=True)
+        self.filepath = filepath
+        self.text = text
+        self.page_count = page_count
+        self.result_queue = result_queue
+        self.index_path = index_path
+        self._stop_event = threading.Event()
+        self.start()
+
+    def run(self):
+        if self.index_path:
+            self._search_index()
+        else:
+            self._scan()
+
+    @metrics.timed("search.index")
+    def _search_index(self):
+        index = None
+        try:
+            # SQLite connections belong to the thread that opens them
+            index = TextIndex(self.index_path)
+            hits = index.search(self.text)
+            if hits and not self._stop_event.is_set():
+                self.result_queue.put(("hits", hits))
+        except Exception as e:
+            print(f"Search error: {e}")
+        finally:
+            if index is not None:
+                index.close()
+            self.result_queue.put(("done", self.page_count))
+
+    @metrics.timed("search.scan")
+    def _scan(self):
+        try:
+            doc = fitz.open(self.filepath)
+        except Exception as e:
+            print(f"Search failed for {self.filepath}: {e}")
+            self.result_queue.put(("done", 0))
+            return
+
+        try:
+            last_progress = time.monotonic()
+            for i in range(self.page_count):
+                if self._stop_event.is_set():
+                    return
+                hits = doc.load_page(i).search_for(self.text)
+                if hits:
+                    self.result_queue.put(("hits", [(i, rect) for rect in hits]))
+                now = time.monotonic()
+                if now - last_progress >= PROGRESS_INTERVAL:
+                    self.result_queue.put(("progress", i + 1))
+                    last_progress = now
+            self.result_queue.put(("done", self.page_count))
+        except Exception as e:
+            print(f"Search error: {e}")
+            self.result_queue.put(("done", self.page_count))
+        finally:
+            doc.close()
+
+    def stop(self):
+        """Cancels the search at the next page."""
+        self._stop_event.set()
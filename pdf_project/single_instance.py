@@ -0,0 +1,138 @@
+# single_instance.py
+"""
+Single-instance mode: the first viewer listens on a local UNIX socket, and
+later launches hand their file to it and exit instead of starting another
+interpreter, Tk and render pool with cold caches.
+
+The protocol is one line per connection: the absolute path of the document
+(empty to only raise the window), answered with "ok" once it is queued for
+the running viewer. On platforms without AF_UNIX every launch runs on its
+own, as without the mode.
+"""
+import os
+import queue
+import socket
+import tempfile
+import threading
+from typing import Optional
+
+from config import INSTANCE_FORWARD_TIMEOUT
+from storage import cache_dir
+
+SOCKET_NAME = "instance.sock"
+# sun_path is 108 bytes on Linux and 104 on macOS
+_MAX_SOCKET_PATH = 100
+_ACCEPT_TIMEOUT = 0.5
+_REPLY = b"ok\n"
+
+
+def available() -> bool:
+    return hasattr(socket, "AF_UNIX")
+
+
+def socket_path() -> str:
+    """The socket of this user's running viewer, in the cache directory unless that path is too long."""
+    path = os.path.join(cache_dir(), SOCKET_NAME)
+    if len(path.encode()) > _MAX_SOCKET_PATH:
+        path = os.path.join(tempfile.gettempdir(), f"pdfviewer-{os.getuid()}.sock")
+    return path
+
+
+def forward(path: Optional[str]) -> bool:
+    """
+    Hands a document to the running viewer. Returns True if it took it, False
+    if there is none (or it did not answer) and this process has to open it.
+    """
+    if not available():
+        return False
+    message = (os.path.abspath(path) if path else "") + "\n"
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(INSTANCE_FORWARD_TIMEOUT)
+            sock.connect(socket_path())
+            sock.sendall(message.encode("utf-8"))
+            return sock.makefile("rb").readline() == _REPLY
+    except OSError:
+        return False
+
+
+class InstanceServer(threading.Thread):
+    """
+    Accepts documents forwarded by later launches and puts their paths on
+    `out_queue` ("" only raises the window). Construct it with listen().
+    """
+    def __init__(self, sock: socket.socket, path: str, out_queue: queue.Queue):
+        super().__init__(daemon=True)
+        self.sock = sock
+        self.path = path
+        self.out_queue = out_queue
+        self._stop_event = threading.Event()
+        self.start()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                conn, _ = self.sock.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            try:
+                with conn:
+                    conn.settimeout(INSTANCE_FORWARD_TIMEOUT)
+                    line = conn.makefile("rb").readline()
+                    if not line.endswith(b"\n"):
+                        continue
+                    self.out_queue.put(line.decode("utf-8", "replace").rstrip("\n"))
+                    conn.sendall(_REPLY)
+            except OSError as e:
+                print(f"Forwarded document not received: {e}")
+
+    def stop(self):
+        """Stops accepting and removes the socket, so the next launch starts a new viewer."""
+        self._stop_event.set()
+        self.sock.close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+
+def listen(out_queue: queue.Queue) -> Optional[InstanceServer]:
+    """
+    Makes this process the running viewer. Returns None if AF_UNIX is missing,
+    another viewer already listens, or the socket cannot be created.
+    """
+    if not available():
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        path = socket_path()
+        try:
+            sock.bind(path)
+        except OSError:
+            # Left over from a viewer that did not exit cleanly, unless one still answers
+            if _is_listening(path):
+                sock.close()
+                return None
+            os.unlink(path)
+            sock.bind(path)
+        os.chmod(path, 0o600)
+        sock.listen()
+        sock.settimeout(_ACCEPT_TIMEOUT)
+    except OSError as e:
+        print(f"Single-instance mode unavailable: {e}")
+        sock.close()
+        return None
+    return InstanceServer(sock, path, out_queue)
+
+
+def _is_listening(path: str) -> bool:
+    """True if a viewer accepts connections on the socket at `path`."""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(INSTANCE_FORWARD_TIMEOUT)
+            sock.connect(path)
+            return True
+    except OSError:
+        return False
@@ -0,0 +1,62 @@
+# storage.py
+import os
+import sys
+import hashlib
+import tempfile
+
+from config import CACHE_DIR_NAME
+
+# Bytes hashed at the start and at the end of a file for its fingerprint
+FINGERPRINT_SAMPLE_BYTES = 64 * 1024
+
+
+def cache_dir(*parts: str) -> str:
+    """
+    Returns (and creates) a directory inside the per-user cache directory.
+    The location can be overridden with the PDFVIEWER_CACHE_DIR environment variable.
+    """
+    root = os.environ.get("PDFVIEWER_CACHE_DIR")
+    if not root:
+        if sys.platform == "win32":
+            base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        else:
+            base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        root = os.path.join(base, CACHE_DIR_NAME)
+    path = os.path.join(root, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def file_fingerprint(path: str) -> str:
+    """
+    Returns a key identifying the exact contents of a file.
+    It combines size and modification time with a hash of the first and last
+    FINGERPRINT_SAMPLE_BYTES, so it stays cheap for very large files.
+    """
+    st = os.stat(path)
+    h = hashlib.sha1(f"{st.st_size}:{st.st_mtime_ns}".encode())
+    with open(path, "rb") as f:
+        h.update(f.read(FINGERPRINT_SAMPLE_BYTES))
+        if st.st_size > FINGERPRINT_SAMPLE_BYTES:
+            f.seek(max(st.st_size - FINGERPRINT_SAMPLE_BYTES, FINGERPRINT_SAMPLE_BYTES))
+            h.update(f.read(FINGERPRINT_SAMPLE_BYTES))
+    return h.hexdigest()
+
+
+def atomic_write(path: str, data: bytes):
+    """
+    Writes a file so that readers see either the old or the new contents, never
+    a partial file. The data goes to a temp file in the same directory which then
+    replaces the target.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
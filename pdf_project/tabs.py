@@ -0,0 +1,41 @@
+# tabs.py
+import os
+
+# Controller and view attributes that belong to one open document
+DOCUMENT_STATE = (
+    "pdf_model", "renderer", "disk_cache", "layout", "size_scanner", "search_worker", "index_builder",
+    "thumbnail_worker", "thumbnails", "result_queue", "size_queue", "search_queue", "thumb_queue",
+    "cache", "page_count", "current_page", "zoom", "rotation", "page_dims", "page_positions",
+    "search_active", "search_term", "search_results", "current_search_hit", "search_progress",
+    "scroll_direction", "_last_scroll_y", "_shown_pages", "_layout_width",
+)
+
+
+class DocumentTab:
+    """
+    An open document in a background tab.
+
+    The controller always works on its own attributes for the active
+    document. Switching tabs moves the DOCUMENT_STATE attributes into the
+    outgoing tab and back from the incoming one, so a background tab keeps
+    its model (with geometry and text indexes), layout, workers and view
+    state exactly as they were.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        # Vertical scroll position (fraction of the document) while in the background
+        self.scroll_fraction = 0.0
+
+    @property
+    def title(self) -> str:
+        return os.path.basename(self.path)
+
+    def store(self, app):
+        """Takes the active document's state from the controller."""
+        for name in DOCUMENT_STATE:
+            setattr(self, name, getattr(app, name))
+
+    def restore(self, app):
+        """Makes this tab's document the controller's active document."""
+        for name in DOCUMENT_STATE:
+            setattr(app, name, getattr(self, name))
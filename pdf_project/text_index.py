@@ -0,0 +1,173 @@
+# text_index.py
+import os
+import pathlib
+import sqlite3
+import tempfile
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import fitz  # PyMuPDF
+
+_SCHEMA_VERSION = "1"
+
+_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE vocab (id INTEGER PRIMARY KEY, word TEXT UNIQUE);
+CREATE TABLE postings (
+    word_id INTEGER, page INTEGER, seq INTEGER,
+    x0 REAL, y0 REAL, x1 REAL, y1 REAL,
+    PRIMARY KEY (word_id, page, seq)
+) WITHOUT ROWID;
+"""
+
+
+def _like_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class TextIndex:
+    """
+    Word-level inverted index of a document's text, stored in SQLite.
+
+    Every word is stored lowercased once in `vocab`; `postings` holds each
+    occurrence with its page, its position in the page's reading order and
+    its bounding box. A search only reads the vocabulary and the postings of
+    the matching words, never the document itself.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        # Quoted, so "?", "#" or "%" in the path are not read as URI syntax
+        uri = pathlib.Path(os.path.abspath(path)).as_uri() + "?mode=ro"
+        self._conn = sqlite3.connect(uri, uri=True)
+
+    @classmethod
+    def load(cls, path: str, page_count: int) -> Optional["TextIndex"]:
+        """Opens a complete index. Returns None if there is none, or if it is incomplete or corrupt."""
+        if not os.path.exists(path):
+            return None
+        try:
+            index = cls(path)
+            meta = dict(index._conn.execute("SELECT key, value FROM meta"))
+        except sqlite3.Error:
+            meta = {}
+            index = None
+        if meta.get("version") != _SCHEMA_VERSION or meta.get("page_count") != str(page_count):
+            if index:
+                index.close()
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return index
+
+    def search(self, text: str) -> List[Tuple[int, fitz.Rect]]:
+        """
+        Case-insensitive search for `text`, with the same substring semantics as
+        page.search_for: a single word matches anywhere inside a word; for several
+        words the first must end a word, the middle ones match whole words and
+        the last must start a word. Returns (page_index, rect) sorted by position,
+        where rect covers the matched words.
+        """
+        tokens = text.lower().split()
+        if not tokens:
+            return []
+
+        if len(tokens) == 1:
+            patterns = [("LIKE", f"%{_like_escape(tokens[0])}%")]
+        else:
+            patterns = [("LIKE", f"%{_like_escape(tokens[0])}")]
+            patterns += [("=", token) for token in tokens[1:-1]]
+            patterns.append(("LIKE", f"{_like_escape(tokens[-1])}%"))
+
+        occurrences = [self._occurrences(op, pattern) for op, pattern in patterns]
+        # Walk the rarest word and check its neighbours in the other posting lists
+        rarest = min(range(len(occurrences)), key=lambda k: len(occurrences[k]))
+        results = []
+        for page, seq in sorted(occurrences[rarest]):
+            start = seq - rarest
+            rects = [occurrences[k].get((page, start + k)) for k in range(len(occurrences))]
+            if None in rects:
+                continue
+            match = fitz.Rect(rects[0])
+            for rect in rects[1:]:
+                match |= rect
+            results.append((page, match))
+        return results
+
+    def _occurrences(self, op: str, pattern: str) -> Dict[Tuple[int, int], Tuple[float, float, float, float]]:
+        escape = " ESCAPE '\\'" if op == "LIKE" else ""
+        rows = self._conn.execute(
+            "SELECT p.page, p.seq, p.x0, p.y0, p.x1, p.y1 FROM vocab v "
+            f"JOIN postings p ON p.word_id = v.id WHERE v.word {op} ?{escape}", (pattern,))
+        return {(page, seq): (x0, y0, x1, y1) for page, seq, x0, y0, x1, y1 in rows}
+
+    def close(self):
+        self._conn.close()
+
+
+class TextIndexBuilder(threading.Thread):
+    """
+    A worker thread that extracts the words of every page and writes a
+    TextIndex. The index is built in a temporary file next to `path` and
+    moved into place only when it is complete, so readers never see a
+    partial index.
+    """
+    BATCH_PAGES = 64
+
+    def __init__(self, filepath: str, page_count: int, path: str):
+        super().__init__(daemon=True)
+        self.filepath = filepath
+        self.page_count = page_count
+        self.path = path
+        self._stop_event = threading.Event()
+        self.start()
+
+    def run(self):
+        tmp_path = None
+        conn = None
+        doc = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), prefix=".tmp-", suffix=".sqlite")
+            os.close(fd)
+            doc = fitz.open(self.filepath)
+            conn = sqlite3.connect(tmp_path)
+            conn.executescript(_SCHEMA)
+            vocab: Dict[str, int] = {}
+            rows = []
+            for i in range(self.page_count):
+                if self._stop_event.is_set():
+                    return
+                for seq, w in enumerate(doc.load_page(i).get_text("words")):
+                    word = w[4].lower()
+                    word_id = vocab.get(word)
+                    if word_id is None:
+                        word_id = vocab[word] = len(vocab) + 1
+                    rows.append((word_id, i, seq, w[0], w[1], w[2], w[3]))
+                if (i + 1) % self.BATCH_PAGES == 0:
+                    conn.executemany("INSERT INTO postings VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                    rows.clear()
+            conn.executemany("INSERT INTO postings VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.executemany("INSERT INTO vocab VALUES (?, ?)", ((i, w) for w, i in vocab.items()))
+            conn.executemany("INSERT INTO meta VALUES (?, ?)",
+                             [("version", _SCHEMA_VERSION), ("page_count", str(self.page_count))])
+            conn.commit()
+            conn.close()
+            conn = None
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Text index build failed for {self.filepath}: {e}")
+        finally:
+            if conn is not None:
+                conn.close()
+            if doc is not None:
+                doc.close()
+            if tmp_path and os.path.exists(tmp_path):
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+    def stop(self):
+        """Abandons the build at the next page."""
+        self._stop_event.set()
@@ -0,0 +1,195 @@
+# thumbnails.py
+import os
+import queue
+import struct
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, Optional, Set
+
+import fitz  # PyMuPDF
+
+from config import THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT
+from render_pool import render_pixmap
+from scheduler import RenderScheduler, PRIORITY_VISIBLE
+
+# Header: magic, version, page count. Followed by (offset, length) per page and the PNG blobs
+_HEADER = struct.Struct("<8sII")
+_ENTRY = struct.Struct("<II")
+_MAGIC = b"PDFVTHB\0"
+_VERSION = 1
+
+
+class ThumbnailStore:
+    """
+    The thumbnails of one document, kept on disk as a single packed file.
+
+    The file holds a header, an (offset, length) entry for every page (0, 0 for
+    pages without a thumbnail yet) and the PNG data of the thumbnails. Opening
+    a warm document reads it with one read; new thumbnails are collected in
+    memory and appended together by save(), which then points their entries at
+    them, so saving costs only the new thumbnails. With no `path` nothing is
+    stored.
+    """
+    def __init__(self, path: Optional[str], page_count: int, blobs: Optional[Dict[int, bytes]] = None):
+        self.path = path
+        self.page_count = page_count
+        self._blobs: Dict[int, bytes] = blobs or {}
+        # Pages whose thumbnail is not in the file yet
+        self._new: Set[int] = set()
+        # The file exists with this page count, so new thumbnails can be appended
+        self._on_disk = blobs is not None
+
+    @property
+    def unsaved(self) -> int:
+        return len(self._new)
+
+    def __contains__(self, page_index: int) -> bool:
+        return page_index in self._blobs
+
+    def __len__(self) -> int:
+        return len(self._blobs)
+
+    def get(self, page_index: int) -> Optional[bytes]:
+        """Returns the PNG data of a page's thumbnail, or None."""
+        return self._blobs.get(page_index)
+
+    def put(self, page_index: int, png: bytes):
+        self._blobs[page_index] = png
+        if self.path is not None:
+            self._new.add(page_index)
+
+    @classmethod
+    def load(cls, path: str, page_count: int) -> "ThumbnailStore":
+        """Reads a thumbnail file. A missing, stale or corrupt file gives an empty store."""
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return cls(path, page_count)
+
+        try:
+            magic, version, count = _HEADER.unpack_from(data, 0)
+            if magic != _MAGIC or version != _VERSION or count != page_count:
+                raise ValueError("stale thumbnail file")
+            blobs = {}
+            for i in range(count):
+                offset, length = _ENTRY.unpack_from(data, _HEADER.size + i * _ENTRY.size)
+                if length:
+                    if offset + length > len(data):
+                        raise ValueError("truncated thumbnail file")
+                    blobs[i] = data[offset:offset + length]
+            return cls(path, page_count, blobs)
+        except (struct.error, ValueError):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return cls(path, page_count)
+
+    def save(self):
+        """
+        Appends the new thumbnails to the packed file and then updates their
+        entries, so an interrupted save leaves every entry pointing at complete
+        data. The file is created (with every thumbnail) if it does not exist.
+
+        Several viewers may save the same document's thumbnails: the blobs are
+        appended with O_APPEND in one write, so they never overwrite each
+        other, and their offset is read back from where that write ended.
+        """
+        if not self._new or self.path is None:
+            return
+        try:
+            if not self._on_disk:
+                self._create_file()
+                self._on_disk = True
+                self._new = set(self._blobs)
+            pages = sorted(self._new)
+            data = b"".join(self._blobs[i] for i in pages)
+            with open(self.path, "ab", buffering=0) as f:
+                written = 0
+                while written < len(data):
+                    written += f.write(data[written:])
+                offset = f.tell() - len(data)
+            with open(self.path, "r+b") as f:
+                for i in pages:
+                    length = len(self._blobs[i])
+                    f.seek(_HEADER.size + i * _ENTRY.size)
+                    f.write(_ENTRY.pack(offset, length))
+                    offset += length
+            self._new.clear()
+        except OSError as e:
+            # Removed meanwhile, e.g. by another viewer finding it stale: written in full next time
+            self._on_disk = False
+            print(f"Could not write thumbnail cache: {e}")
+
+    def _create_file(self):
+        """Creates the file with empty entries, unless another viewer has created it meanwhile."""
+        entries = bytes(_ENTRY.size * self.page_count)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_HEADER.pack(_MAGIC, _VERSION, self.page_count) + entries)
+            # Linking fails if the file exists, so it appears complete or not at all
+            os.link(tmp_path, self.path)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(tmp_path)
+
+
+class ThumbnailWorker(threading.Thread):
+    """
+    A worker thread rendering thumbnails at low resolution, in its own lane
+    beside the RenderWorker. It has its own document handle and scheduler,
+    and only takes a job while `is_busy()` reports that the main view has no
+    pages waiting, so thumbnails never delay the pages being read.
+    Results are put on `result_queue` as (page_index, png_data).
+    """
+    IDLE_WAIT = 0.02
+
+    def __init__(self, filepath: str, result_queue: queue.Queue, is_busy: Callable[[], bool]):
+        super().__init__(daemon=True)
+        self.filepath = filepath
+        self.result_queue = result_queue
+        self.is_busy = is_busy
+        self.scheduler = RenderScheduler()
+        self._stop_event = threading.Event()
+        self.start()
+
+    def run(self):
+        try:
+            doc = fitz.open(self.filepath)
+        except Exception as e:
+            print(f"Thumbnail rendering failed for {self.filepath}: {e}")
+            return
+
+        try:
+            while True:
+                # Yield to the main render lane
+                while self.is_busy() and not self._stop_event.is_set():
+                    time.sleep(self.IDLE_WAIT)
+                job = self.scheduler.get()
+                if job is None:
+                    break
+                try:
+                    page = doc.load_page(job.page_index)
+                    rect = page.rect
+                    zoom = min(THUMBNAIL_WIDTH / rect.width, THUMBNAIL_HEIGHT / rect.height)
+                    pix = render_pixmap(page, zoom, 0)
+                    self.result_queue.put((job.page_index, pix.tobytes("png")))
+                except Exception as e:
+                    print(f"Thumbnail error on page {job.page_index}: {e}")
+        finally:
+            doc.close()
+
+    def request(self, page_index: int, priority: int = PRIORITY_VISIBLE):
+        self.scheduler.submit(page_index, 0.0, 0, priority)
+
+    def retain(self, page_indices):
+        """Cancels pending thumbnails of pages that are no longer in the panel's window."""
+        self.scheduler.retain((i, None) for i in page_indices)
+
+    def stop(self):
+        self._stop_event.set()
+        self.scheduler.close()
@@ -0,0 +1,29 @@
+# tiles.py
+from typing import List, Tuple
+
+from config import TILE_SIZE, TILE_THRESHOLD_PIXELS
+
+# A tile is given by its pixel rectangle (x0, y0, x1, y1) within the rendered page
+Tile = Tuple[int, int, int, int]
+
+
+def needs_tiling(width: int, height: int) -> bool:
+    """True if a page rendered at this size should be split into tiles."""
+    return width * height > TILE_THRESHOLD_PIXELS
+
+
+def tiles_in_region(width: int, height: int, x0: float, y0: float, x1: float, y1: float) -> List[Tile]:
+    """
+    Returns the tiles of a `width` x `height` page that intersect the region
+    (x0, y0, x1, y1), given in page pixel coordinates, in row-major order.
+    """
+    x0, y0 = max(int(x0), 0), max(int(y0), 0)
+    x1, y1 = min(int(x1), width), min(int(y1), height)
+    if x0 >= x1 or y0 >= y1:
+        return []
+
+    tiles = []
+    for ty in range(y0 // TILE_SIZE * TILE_SIZE, y1, TILE_SIZE):
+        for tx in range(x0 // TILE_SIZE * TILE_SIZE, x1, TILE_SIZE):
+            tiles.append((tx, ty, min(tx + TILE_SIZE, width), min(ty + TILE_SIZE, height)))
+    return tiles
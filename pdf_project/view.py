@@ -1,14 +1,28 @@
 # view.py
 import tkinter as tk
 from tkinter import ttk
-from collections import deque
-from PIL import Image, ImageTk
 import ctypes
-import fitz
 
+import metrics
 from tooltip import Tooltip
 from icon_loader import load_icons
-from config import THEMES, CACHE_SIZE_LIMIT, RENDER_BUFFER_PAGES
+from page_cache import PageCache, MemoryBudget
+from canvas_pool import CanvasItemPool
+from prefetch import ScrollTracker
+from config import (THEMES, CACHE_MEMORY_BUDGET, RENDER_BUFFER_PAGES, THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT,
+                    THUMBNAIL_SPACING, PROFILE_OVERLAY_INTERVAL_MS)
+
+# Sections shown in the performance overlay, with their labels
+PERF_OVERLAY_SECTIONS = (
+    ("render.queue_wait", "Kö"),
+    ("render.pixmap", "Rendering"),
+    ("render.ppm", "PPM"),
+    ("ui.photoimage", "PhotoImage"),
+    ("ui.drain", "Tömning"),
+    ("ui.layout", "Layout"),
+    ("search.scan", "Sök"),
+    ("search.index", "Sök (index)"),
+)
 
 class View(tk.Tk):
     """
@@ -28,15 +42,20 @@ class View(tk.Tk):
 
         self.page_dims = []
         self.page_positions = []
-        self.cache = {}
-        self.cache_keys = deque()
-        self.canvas_items = []
+        # One memory budget for the page caches of all open documents
+        self.memory_budget = MemoryBudget(CACHE_MEMORY_BUDGET)
+        # Rendered pages and tiles keyed by (page_index, tile), tile is None for a full page
+        self.cache = self.new_page_cache()
+        # Scroll velocity from wheel and scrollbar, drives the prefetch window
+        self.scroll_tracker = ScrollTracker()
 
         self.search_active = False
         self.search_term = ""
         self.search_results = []
         self.current_search_hit = 0
         self.search_highlight_items = []
+        # Pages searched so far while a background search is running, otherwise None
+        self.search_progress = None
 
         self._setup_window()
         self._setup_styles()
@@ -69,12 +88,21 @@ class View(tk.Tk):
         self.style.configure('TFrame', background=self.theme['bg'])
         self.style.configure('TLabel', background=self.theme['bg'], foreground=self.theme['fg'])
         self.style.configure('TSeparator', background=self.theme['canvas_bg'])
+        self.style.configure('TNotebook', background=self.theme['bg'], borderwidth=0)
+        self.style.configure('TNotebook.Tab', background=self.theme['btn_bg'], foreground=self.theme['fg'],
+                             padding=(10, 2))
+        self.style.map('TNotebook.Tab', background=[('selected', self.theme['canvas_bg'])])
 
     def _create_widgets(self):
-        self.placeholder = ImageTk.PhotoImage(Image.new("RGBA", (16, 16), (0, 0, 0, 0)))
-        self.icons = load_icons(self.placeholder)
+        # A new PhotoImage is fully transparent
+        self.placeholder = tk.PhotoImage(width=16, height=16)
+        # Icons and tooltips are attached by create_deferred_widgets() once the window is on screen
+        self.icons = {}
+        self._icon_buttons = {}
+        self._pending_tooltips = []
 
         self._create_toolbar()
+        self._create_tab_bar()
         self._create_main_content()
         self._create_statusbar()
 
@@ -82,9 +110,12 @@ class View(tk.Tk):
         toolbar = ttk.Frame(self, style='TFrame', padding=5)
         toolbar.pack(side=tk.TOP, fill=tk.X)
 
-        btn_open = ttk.Button(toolbar, image=self.icons.get('open', self.placeholder), command=self.open_pdf)
+        btn_open = self._icon_button(toolbar, 'open', command=self.open_pdf)
         btn_open.pack(side=tk.LEFT, padx=5)
-        Tooltip(btn_open, "Öppna PDF (Ctrl+O)")
+        self._tooltip(btn_open, "Öppna PDF (Ctrl+O)")
+        btn_close = ttk.Button(toolbar, text="✕", command=self.close_tab, width=3)
+        btn_close.pack(side=tk.LEFT)
+        self._tooltip(btn_close, "Stäng flik (Ctrl+W)")
 
         ttk.Separator(toolbar, orient=tk.VERTICAL).pack(side=tk.LEFT, padx=5, fill='y')
 
@@ -95,52 +126,114 @@ class View(tk.Tk):
         self.page_entry.bind("<Return>", self.goto_page_event)
         btn_next = ttk.Button(toolbar, text="▶", command=self.next_page, width=3)
         btn_next.pack(side=tk.LEFT, padx=(0, 5))
-        Tooltip(btn_prev, "Föregående sida (Vänsterpil)")
-        Tooltip(btn_next, "Nästa sida (Högerpil)")
+        self._tooltip(btn_prev, "Föregående sida (Vänsterpil)")
+        self._tooltip(btn_next, "Nästa sida (Högerpil)")
 
         ttk.Separator(toolbar, orient=tk.VERTICAL).pack(side=tk.LEFT, padx=5, fill='y')
 
-        btn_zoom_out = ttk.Button(toolbar, image=self.icons.get('zoom_out', self.placeholder), command=self._zoom_out)
+        btn_zoom_out = self._icon_button(toolbar, 'zoom_out', command=self._zoom_out)
         btn_zoom_out.pack(side=tk.LEFT, padx=(5, 0))
         self.zoom_entry = ttk.Entry(toolbar, width=6, justify="center")
         self.zoom_entry.insert(0, f"{self.zoom * 100:.0f}%")
         self.zoom_entry.pack(side=tk.LEFT, padx=2)
         self.zoom_entry.bind("<Return>", self._set_zoom_event)
-        btn_zoom_in = ttk.Button(toolbar, image=self.icons.get('zoom_in', self.placeholder), command=self._zoom_in)
+        btn_zoom_in = self._icon_button(toolbar, 'zoom_in', command=self._zoom_in)
         btn_zoom_in.pack(side=tk.LEFT, padx=(0, 5))
-        Tooltip(btn_zoom_in, "Zooma in (Ctrl+Plus)")
-        Tooltip(btn_zoom_out, "Zooma ut (Ctrl+Minus)")
+        self._tooltip(btn_zoom_in, "Zooma in (Ctrl+Plus)")
+        self._tooltip(btn_zoom_out, "Zooma ut (Ctrl+Minus)")
 
-        btn_rotate = ttk.Button(toolbar, image=self.icons.get('rotate', self.placeholder), command=self._rotate)
+        btn_rotate = self._icon_button(toolbar, 'rotate', command=self._rotate)
         btn_rotate.pack(side=tk.LEFT, padx=5)
-        Tooltip(btn_rotate, "Rotera (Ctrl+R)")
+        self._tooltip(btn_rotate, "Rotera (Ctrl+R)")
 
         ttk.Separator(toolbar, orient=tk.VERTICAL).pack(side=tk.LEFT, padx=5, fill='y')
 
         self.search_entry = ttk.Entry(toolbar, width=30)
         self.search_entry.pack(side=tk.LEFT, padx=5, ipady=1)
         self.search_entry.bind("<Return>", self._search_event)
-        Tooltip(self.search_entry, "Sök i dokumentet (Ctrl+F)")
+        self._tooltip(self.search_entry, "Sök i dokumentet (Ctrl+F)")
 
-        btn_search = ttk.Button(toolbar, image=self.icons.get('search', self.placeholder), command=self._search_event)
+        btn_search = self._icon_button(toolbar, 'search', command=self._search_event)
         btn_search.pack(side=tk.LEFT, padx=(0, 2))
-        self.search_prev_btn = ttk.Button(toolbar, image=self.icons.get('up', self.placeholder), state=tk.DISABLED,
-                                          command=self._prev_search_hit)
+        self.search_prev_btn = self._icon_button(toolbar, 'up', state=tk.DISABLED, command=self._prev_search_hit)
         self.search_prev_btn.pack(side=tk.LEFT)
-        self.search_next_btn = ttk.Button(toolbar, image=self.icons.get('down', self.placeholder), state=tk.DISABLED,
-                                          command=self._next_search_hit)
+        self.search_next_btn = self._icon_button(toolbar, 'down', state=tk.DISABLED, command=self._next_search_hit)
         self.search_next_btn.pack(side=tk.LEFT, padx=(0, 5))
-        Tooltip(self.search_prev_btn, "Föregående träff")
-        Tooltip(self.search_next_btn, "Nästa träff")
+        self._tooltip(self.search_prev_btn, "Föregående träff")
+        self._tooltip(self.search_next_btn, "Nästa träff")
+
+    def _icon_button(self, parent, icon_name, **kwargs):
+        button = ttk.Button(parent, image=self.placeholder, **kwargs)
+        self._icon_buttons[icon_name] = button
+        return button
+
+    def _tooltip(self, widget, text):
+        self._pending_tooltips.append((widget, text))
+
+    def create_deferred_widgets(self):
+        """Loads the toolbar icons and attaches the tooltips, after the window's first paint."""
+        self.icons = load_icons(self.placeholder)
+        for name, button in self._icon_buttons.items():
+            button.config(image=self.icons[name])
+        for widget, text in self._pending_tooltips:
+            Tooltip(widget, text)
+        self._pending_tooltips.clear()
+
+    def _create_tab_bar(self):
+        # Only the tab strip of the notebook is used, all documents share the canvas below it
+        self.tab_bar = ttk.Notebook(self)
+        self.tab_bar.pack(side=tk.TOP, fill=tk.X, padx=10)
+
+    def add_tab_label(self, title):
+        """Adds a tab to the tab strip and selects it."""
+        self.tab_bar.add(ttk.Frame(self.tab_bar, height=0), text=title)
+        self.tab_bar.select(self.tab_bar.index("end") - 1)
 
     def _create_main_content(self):
         main_frame = ttk.Frame(self, style='TFrame')
         main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        # Thumbnail sidebar, items only exist for the thumbnails in view
+        self.thumb_canvas = tk.Canvas(main_frame, width=THUMBNAIL_WIDTH + 2 * THUMBNAIL_SPACING,
+                                      bg=self.theme["bg"], highlightthickness=0)
+        self.thumb_scroll = ttk.Scrollbar(main_frame, orient=tk.VERTICAL, command=self._on_thumb_yscroll)
+        self.thumb_canvas.configure(yscrollcommand=self.thumb_scroll.set)
+        self.thumb_canvas.pack(side=tk.LEFT, fill=tk.Y)
+        self.thumb_scroll.pack(side=tk.LEFT, fill=tk.Y, padx=(0, 10))
+        self.thumb_items = CanvasItemPool(self.thumb_canvas, self.placeholder, anchor="n")
+
         self.canvas = tk.Canvas(main_frame, bg=self.theme["canvas_bg"], highlightthickness=0)
-        self.scroll_y = ttk.Scrollbar(main_frame, orient=tk.VERTICAL, command=self.canvas.yview)
-        self.canvas.configure(yscrollcommand=self.scroll_y.set)
+        self.scroll_y = ttk.Scrollbar(main_frame, orient=tk.VERTICAL, command=self._on_yscroll)
+        self.scroll_x = ttk.Scrollbar(main_frame, orient=tk.HORIZONTAL, command=self._on_xscroll)
+        self.canvas.configure(yscrollcommand=self.scroll_y.set, xscrollcommand=self.scroll_x.set)
         self.scroll_y.pack(side=tk.RIGHT, fill=tk.Y)
+        self.scroll_x.pack(side=tk.BOTTOM, fill=tk.X)
         self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        # Canvas items only exist for the pages around the viewport
+        self.page_items = CanvasItemPool(self.canvas, self.placeholder)
+
+    def _on_yscroll(self, *args):
+        self.canvas.yview(*args)
+        self.scroll_tracker.record(self.canvas.canvasy(0))
+        self.request_render_visible_pages()
+
+    def _on_thumb_yscroll(self, *args):
+        self.thumb_canvas.yview(*args)
+        self.update_thumbnails()
+
+    def _on_thumb_mousewheel(self, event):
+        delta = event.delta if hasattr(event, "delta") else (120 if event.num == 4 else -120)
+        self.thumb_canvas.yview_scroll(-1 * (delta // 120), "units")
+        self.update_thumbnails()
+
+    def _on_thumb_click(self, event):
+        page_index = int(self.thumb_canvas.canvasy(event.y) // self.thumbnail_slot_height())
+        if 0 <= page_index < self.page_count:
+            self.scroll_to_page(page_index)
+
+    def _on_xscroll(self, *args):
+        self.canvas.xview(*args)
+        self.request_render_visible_pages()
 
     def _create_statusbar(self):
         statusbar = ttk.Frame(self, style='TFrame', padding=(5, 2))
@@ -149,6 +242,9 @@ class View(tk.Tk):
         self.info_lbl_left.pack(side=tk.LEFT, padx=10)
         self.info_lbl_right = ttk.Label(statusbar, text="Sida: -/- | Zoom: - | Rot: -", anchor="e")
         self.info_lbl_right.pack(side=tk.RIGHT, padx=10)
+        # Performance overlay (F12), a second status bar row while shown
+        self.perf_lbl = ttk.Label(statusbar, anchor="w", font="TkFixedFont")
+        self._perf_after = None
 
     def _bind_ui_events(self):
         self.bind("<Left>", lambda e: self.prev_page())
@@ -159,26 +255,88 @@ class View(tk.Tk):
         self.bind("<Control-r>", lambda e: self._rotate())
         self.bind("<Control-plus>", lambda e: self._zoom_in())
         self.bind("<Control-minus>", lambda e: self._zoom_out())
+        self.bind("<Control-w>", lambda e: self.close_tab())
+        self.bind("<F12>", lambda e: self.toggle_perf_overlay())
+        self.tab_bar.bind("<<NotebookTabChanged>>", self._on_tab_changed)
         self.canvas.bind("<Configure>", self._on_resize)
         self.canvas.bind("<MouseWheel>", self._on_mousewheel)
         self.canvas.bind("<Button-4>", self._on_mousewheel)
         self.canvas.bind("<Button-5>", self._on_mousewheel)
+        self.thumb_canvas.bind("<Button-1>", self._on_thumb_click)
+        self.thumb_canvas.bind("<Configure>", lambda e: self.update_thumbnails())
+        self.thumb_canvas.bind("<MouseWheel>", self._on_thumb_mousewheel)
+        self.thumb_canvas.bind("<Button-4>", self._on_thumb_mousewheel)
+        self.thumb_canvas.bind("<Button-5>", self._on_thumb_mousewheel)
 
     def reset_ui_for_new_pdf(self, page_count):
         self.page_count = page_count
         self.current_page = 0
         self.rotation = 0
         self.zoom = 1.0
-        self.page_dims.clear()
-        self.page_positions.clear()
+        self.page_dims = []
+        self.page_positions = []
         self.cache.clear()
-        self.cache_keys.clear()
-        self.canvas.delete("all")
-        self.canvas_items = [self.canvas.create_image(0, 0, anchor="nw", image=self.placeholder) for _ in
-                             range(self.page_count)]
+        self.reset_canvases()
         self.clear_search()
         self.update_statusbar()
 
+    def reset_canvases(self):
+        """Removes the shown document's items from the page canvas and the thumbnail panel."""
+        self.scroll_tracker.reset()
+        self.canvas.delete("all")
+        self.page_items.clear()
+        self.search_highlight_items.clear()
+        self.thumb_canvas.delete("all")
+        self.thumb_items.clear()
+        self.thumb_canvas.config(scrollregion=(0, 0, 0, self.page_count * self.thumbnail_slot_height()))
+        self.thumb_canvas.yview_moveto(0)
+        self.thumb_canvas.create_rectangle(0, 0, 0, 0, outline=self.theme["highlight"], width=2,
+                                           tags=("current",), state="hidden")
+
+    def new_page_cache(self):
+        """Creates a document's page cache, counted against the memory budget shared by all tabs."""
+        return PageCache(CACHE_MEMORY_BUDGET, on_evict=self.release_cached, shared=self.memory_budget)
+
+    def release_cached(self, key, value):
+        """Takes a page or tile that left the cache off the canvas."""
+        page_index, tile = key
+        if tile is None:
+            item = self.page_items.get(page_index)
+            if item is not None:
+                self.canvas.itemconfig(item, image=self.placeholder)
+        else:
+            self.canvas.delete(value.item)
+
+    def toggle_perf_overlay(self):
+        """Shows or hides the live timings of the hot paths below the status bar."""
+        if self._perf_after:
+            self.after_cancel(self._perf_after)
+            self._perf_after = None
+            self.perf_lbl.pack_forget()
+            return
+        self.perf_lbl.pack(side=tk.BOTTOM, fill=tk.X, padx=10, before=self.info_lbl_left)
+        self._update_perf_overlay()
+
+    def _update_perf_overlay(self):
+        if not metrics.enabled():
+            self.perf_lbl.config(text=f"Mätning av - starta med --profile eller {metrics.ENV_VAR}=1")
+            self._perf_after = self.after(PROFILE_OVERLAY_INTERVAL_MS, self._update_perf_overlay)
+            return
+        parts = []
+        for name, label in PERF_OVERLAY_SECTIONS:
+            ms = metrics.recent_ms(name)
+            if ms is not None:
+                parts.append(f"{label} {ms:.1f} ms")
+        stats = self.cache.stats()
+        lookups = stats["hits"] + stats["misses"]
+        if lookups:
+            parts.append(f"Cache {stats['hits'] / lookups:.0%} ({stats['bytes'] >> 20} MB)")
+        disk_lookups = metrics.counter("cache.disk_hit") + metrics.counter("cache.disk_miss")
+        if disk_lookups:
+            parts.append(f"Disk {metrics.counter('cache.disk_hit') / disk_lookups:.0%}")
+        self.perf_lbl.config(text=" | ".join(parts) or "Inga mätningar än")
+        self._perf_after = self.after(PROFILE_OVERLAY_INTERVAL_MS, self._update_perf_overlay)
+
     def update_statusbar(self):
         if not self.pdf_model:
             self.info_lbl_left.config(text="Ingen fil öppen")
@@ -194,7 +352,14 @@ class View(tk.Tk):
         rot_info = f"Rot: {self.rotation}°"
 
         if self.search_active:
-            search_info = f" | Träff: {self.current_search_hit + 1}/{len(self.search_results)}" if self.search_results else " | Inga träffar"
+            if self.search_results:
+                search_info = f" | Träff: {self.current_search_hit + 1}/{len(self.search_results)}"
+            elif self.search_progress is None:
+                search_info = " | Inga träffar"
+            else:
+                search_info = ""
+            if self.search_progress is not None and self.page_count:
+                search_info += f" | Söker: {self.search_progress * 100 // self.page_count}%"
             page_info += search_info
 
         self.info_lbl_right.config(text=f"{page_info} | {zoom_info} | {rot_info}")
@@ -228,19 +393,55 @@ class View(tk.Tk):
         if not self.pdf_model or not self.page_dims:
             return
 
-        page_width = self.pdf_model.get_page_size(page_index).width
+        page_width = self.layout.page_size(page_index)[0]
         scale = self.get_page_scale(page_width)
 
-        x_offset = max((self.canvas.winfo_width() - self.page_dims[page_index][0]) // 2, 0)
+        x_offset = self.page_x(page_index)
         y_offset = self.page_positions[page_index]
 
+        import fitz  # Loaded by now, a document is open; not imported at startup
         transform = fitz.Matrix(scale, scale).prerotate(self.rotation)
         r_on_canvas = rect * transform + fitz.Point(x_offset, y_offset)
 
         item = self.canvas.create_rectangle(r_on_canvas.x0, r_on_canvas.y0, r_on_canvas.x1, r_on_canvas.y1,
-                                            fill=self.theme["highlight"], stipple="gray50", outline="")
+                                            fill=self.theme["highlight"], stipple="gray50", outline="",
+                                            tags=("highlight",))
         self.search_highlight_items.append(item)
 
+    def page_image(self, page_index):
+        """Returns the cached image of a full page, or the placeholder."""
+        entry = self.cache.peek((page_index, None))
+        return entry.image if entry is not None else self.placeholder
+
+    def page_origin(self, page_index):
+        """Returns the canvas (x, y) of a page's top left corner."""
+        return self.page_x(page_index), self.page_positions[page_index]
+
+    def thumbnail_slot_height(self):
+        return THUMBNAIL_HEIGHT + THUMBNAIL_SPACING
+
+    def thumbnail_origin(self, page_index):
+        """Returns the sidebar (x, y) of a thumbnail's top center."""
+        return int(self.thumb_canvas.cget("width")) // 2, \
+            THUMBNAIL_SPACING // 2 + page_index * self.thumbnail_slot_height()
+
+    def mark_current_thumbnail(self):
+        """Frames the current page's thumbnail and scrolls the sidebar to it if it is out of view."""
+        if not self.page_count:
+            return
+        slot = self.thumbnail_slot_height()
+        top = self.current_page * slot
+        self.thumb_canvas.coords("current", 2, top + 2, int(self.thumb_canvas.cget("width")) - 2, top + slot - 2)
+        self.thumb_canvas.itemconfig("current", state="normal")
+        view_top = self.thumb_canvas.canvasy(0)
+        if top < view_top or top + slot > view_top + self.thumb_canvas.winfo_height():
+            self.thumb_canvas.yview_moveto(top / (self.page_count * slot))
+            self.update_thumbnails()
+
+    def page_x(self, page_index):
+        """Returns the canvas x position of a page, centered when narrower than the canvas."""
+        return max((self.canvas.winfo_width() - self.page_dims[page_index][0]) // 2, 0)
+
     def get_page_scale(self, page_width):
         if self.fit_to_width and page_width > 0:
             return (self.canvas.winfo_width() / page_width) * self.zoom